@@ -1,10 +1,69 @@
+import time
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.backend.db import async_sessionmaker_
+from app.backend.db import Config, async_sessionmaker_
+from app.backend.replicas import read_replicas
 
+# Expiry (epoch seconds) of a client's read-your-writes window.
+STICKY_COOKIE = "primary_until"
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+
+def reads_primary(request: Request) -> bool:
+    """Whether request must not read from a replica: its client wrote
+    recently, or it is an edge refresh, whose response is cached under the
+    version the write just bumped."""
+    if "x-cache-refresh" in request.headers:
+        return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_write_db(
+    response: Response,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the primary. A commit pins the client's reads to the
+    primary for DB_STICKY_SECONDS, longer than replicas may lag."""
     async with async_sessionmaker_() as session:
+        if read_replicas.replicas:
+
+            @event.listens_for(session.sync_session, "after_commit", once=True)
+            def stick(_) -> None:
+                until = time.time() + Config.DB_STICKY_SECONDS
+                response.set_cookie(
+                    STICKY_COOKIE,
+                    f"{until:.0f}",
+                    max_age=int(Config.DB_STICKY_SECONDS) + 1,
+                    httponly=True,
+                    samesite="lax",
+                )
+
+        yield session
+
+
+def read_sessionmaker(request: Request) -> async_sessionmaker:
+    """Sessionmaker for request's reads: a healthy replica's when there is
+    one, otherwise (or for reads_primary requests) the primary's.
+
+    Routes with an ETag (versions.conditional_get, resolved first) only
+    use replicas that replayed the last bump of its versions: an older
+    body under the new ETag would be revalidated with 304s until the
+    next bump.
+    """
+    return read_replicas.sessionmaker(
+        primary=reads_primary(request),
+        synced_to=getattr(request.state, "bumped_at", 0.0),
+    )
+
+
+async def get_read_db(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes, from read_sessionmaker."""
+    async with read_sessionmaker(request)() as session:
         yield session
@@ -0,0 +1,162 @@
+import anyio
+from loguru import logger
+from sqlalchemy import Update, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import getenv
+from app.models import Product, Rating
+from app.utils import versions
+from app.utils.cache import product_cache
+from app.utils.debounce import Debouncer, DeltaBuffer
+
+RATING_REFRESH_WINDOW = float(getenv("RATING_REFRESH_WINDOW", 2))
+# A couple of quick retries instead of Celery's default of three with
+# growing pauses, so that an unreachable broker soon falls back to the
+# inline refresh.
+PUBLISH_RETRY_POLICY = {
+    "max_retries": 2,
+    "interval_start": 0,
+    "interval_step": 0.25,
+    "interval_max": 0.5,
+}
+
+pending_rating_refreshes = Debouncer(
+    "rating-refresh",
+    # A lost task holds its product for at most this long; the periodic
+    # reconcile_product_ratings fixes whatever it missed.
+    ttl=int(RATING_REFRESH_WINDOW) + 60,
+    redis_url=getenv("REDIS_URL"),
+)
+# Grade sum and count changes of each product since its last refresh.
+pending_rating_deltas = DeltaBuffer(
+    "rating-delta",
+    # Kept well past a lost task's claim, so the next refresh of the
+    # product still applies them; reconciliation covers what expires.
+    ttl=24 * 3600,
+    redis_url=getenv("REDIS_URL"),
+)
+
+
+def _with_average(rating_sum, rating_count) -> dict:
+    return {
+        "rating_sum": rating_sum,
+        "rating_count": rating_count,
+        "rating": case(
+            (rating_count > 0, rating_sum / rating_count), else_=0.0
+        ),
+    }
+
+
+def rating_delta(product_id: int, grade: float, count: int) -> Update:
+    """Atomically add grade/count to a product's rating counters.
+
+    All SET expressions see the old row, so the average is computed from
+    the updated totals in the same statement, without reading ratings.
+    """
+    return (
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            **_with_average(
+                Product.rating_sum + grade, Product.rating_count + count
+            )
+        )
+    )
+
+
+async def reconcile_ratings(
+    db: AsyncSession, product_ids: list[int] | None = None
+) -> list[str]:
+    """Recompute counters from active ratings where they have drifted.
+
+    Returns the slugs of the products that were fixed.
+    """
+    active = (Rating.product_id == Product.id, Rating.is_active == True)
+    grades = (
+        select(func.coalesce(func.sum(Rating.grade), 0.0))
+        .where(*active)
+        .scalar_subquery()
+    )
+    count = select(func.count(Rating.id)).where(*active).scalar_subquery()
+    query = (
+        update(Product)
+        .where(
+            or_(
+                Product.rating_count != count,
+                func.abs(Product.rating_sum - grades) > 1e-6,
+            )
+        )
+        .values(**_with_average(grades, count))
+        .returning(Product.slug)
+        .execution_options(synchronize_session=False)
+    )
+    if product_ids is not None:
+        query = query.where(Product.id.in_(product_ids))
+    return list(await db.scalars(query))
+
+
+async def apply_rating_delta(
+    db: AsyncSession, product_id: int, grade: float, count: int
+) -> str | None:
+    """Add grade/count to one product's counters; returns its slug."""
+    query = rating_delta(product_id, grade, count).returning(Product.slug)
+    return await db.scalar(query)
+
+
+async def apply_pending_delta(db: AsyncSession, product_id: int) -> str | None:
+    """Apply the rating changes buffered for a product; returns its slug.
+
+    Changes that can't be taken (Redis unavailable) stay buffered for the
+    next refresh.
+    """
+    delta = await pending_rating_deltas.take(str(product_id)) or {}
+    return await apply_rating_delta(
+        db, product_id, delta.get("sum", 0.0), round(delta.get("count", 0))
+    )
+
+
+async def schedule_rating_refresh(
+    db: AsyncSession, product_id: int, grade: float = 0.0, count: int = 0
+) -> None:
+    """Add a committed rating change (grade/count) to a product's counters.
+
+    Changes are buffered in Redis and coalesced per product: the first
+    change in a window queues a task that runs at the end of it and adds
+    everything buffered meanwhile in one UPDATE, so a burst of reviews
+    costs one product update per window and review writes never lock the
+    product row. Without Redis or a reachable broker the change is applied
+    inline on db, after the caller's commit.
+    """
+    key = str(product_id)
+    if await pending_rating_deltas.add(key, sum=grade, count=count):
+        claimed = await pending_rating_refreshes.claim(key)
+        if claimed is False:
+            return
+        if claimed:
+            # Deferred: the web process loads Celery on its first refresh.
+            from kombu.exceptions import OperationalError
+
+            from app.tasks import refresh_product_rating
+
+            try:
+                # A blocking publish: in a thread, off the event loop.
+                await anyio.to_thread.run_sync(
+                    lambda: refresh_product_rating.apply_async(
+                        args=[product_id],
+                        countdown=RATING_REFRESH_WINDOW,
+                        retry_policy=PUBLISH_RETRY_POLICY,
+                    )
+                )
+                return
+            except OperationalError as ex:
+                logger.warning(
+                    f"rating refresh for {product_id} not queued: {ex}"
+                )
+                await pending_rating_refreshes.release(key)
+        slug = await apply_pending_delta(db, product_id)
+    else:
+        slug = await apply_rating_delta(db, product_id, grade, count)
+    await db.commit()
+    if slug is not None:
+        await product_cache.invalidate(slug)
+        await versions.bump(versions.CATALOG, versions.product(slug))
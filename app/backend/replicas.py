@@ -0,0 +1,162 @@
+import asyncio
+import itertools
+import time
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.backend import db
+
+PRIMARY_LSN = text("SELECT CAST(pg_current_wal_lsn() AS text)")
+# Seconds the replica's replay trails the primary's WAL position read just
+# before: 0 once it has replayed up to it, else the age of the last
+# replayed transaction. No row (WAL receiver not streaming) or NULL (no
+# transaction replayed yet) means unhealthy: a disconnected replica has
+# replayed all it received but no longer follows the primary.
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_replay_lsn()"
+    " >= CAST(CAST(:primary_lsn AS text) AS pg_lsn) THEN 0"
+    " ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+    " FROM pg_stat_wal_receiver WHERE status = 'streaming'"
+)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = create_async_engine(url, **db.engine_options(url))
+        self.sessionmaker = async_sessionmaker(
+            self.engine, expire_on_commit=False
+        )
+        # Lag measured by the last check; None until a check succeeds and
+        # after one fails.
+        self.lag: float | None = None
+        # Time (time.time()) up to which the primary's commits are known
+        # to be replayed here.
+        self.synced_to = 0.0
+        self.checked_at = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+    async def check(
+        self, started: float, primary_lsn: str | None, timeout: float
+    ) -> None:
+        """Measure lag against primary_lsn, read at started."""
+        try:
+            async with asyncio.timeout(timeout):
+                async with self.engine.connect() as conn:
+                    if conn.dialect.name == "postgresql":
+                        lag = await conn.scalar(
+                            LAG_QUERY, {"primary_lsn": primary_lsn}
+                        )
+                    else:
+                        # SQLite stand-in: the primary's own file.
+                        lag = await conn.scalar(text("SELECT 0"))
+            if lag is None:
+                raise LookupError("not streaming from the primary")
+        except (SQLAlchemyError, OSError, TimeoutError, LookupError) as ex:
+            if self.lag is not None or not self.checked_at:
+                logger.warning(f"replica {self.name}: unavailable: {ex}")
+            self.lag = None
+        else:
+            self.lag = float(lag)
+            self.synced_to = started if not lag else time.time() - self.lag
+        self.checked_at = time.time()
+
+
+class ReplicaSet:
+    """Read replicas, checked in the background and used round-robin.
+
+    Only replicas whose last check, at most two intervals ago, found
+    them within max_lag seconds of the primary take reads; with none
+    left, reads fall back to the primary. Replicas are unused until the
+    first check, which monitor() runs as soon as the app starts.
+    """
+
+    def __init__(self, urls: list[str], max_lag: float, interval: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.interval = interval
+        self._turn = itertools.count()
+        self.stats = {"replica": 0, "primary": 0, "fallback": 0}
+
+    def healthy(self, synced_to: float = 0.0) -> list[Replica]:
+        """Replicas within max_lag that replayed commits up to synced_to."""
+        fresh = time.time() - 2 * self.interval
+        healthy = []
+        for replica in self.replicas:
+            if replica.lag is None or replica.checked_at < fresh:
+                continue
+            if replica.lag <= self.max_lag and replica.synced_to >= synced_to:
+                healthy.append(replica)
+        return healthy
+
+    def sessionmaker(
+        self, primary: bool = False, synced_to: float = 0.0
+    ) -> async_sessionmaker:
+        """The next healthy replica's sessionmaker, or the primary's.
+
+        synced_to is a time the rows must be current to, such as the last
+        bump of the versions a response's ETag is built from.
+        """
+        if primary or not self.replicas:
+            self.stats["primary"] += 1
+            return db.async_sessionmaker_
+        healthy = self.healthy(synced_to)
+        if not healthy:
+            self.stats["fallback"] += 1
+            return db.async_sessionmaker_
+        self.stats["replica"] += 1
+        return healthy[next(self._turn) % len(healthy)].sessionmaker
+
+    async def check(self) -> None:
+        started = time.time()
+        try:
+            async with asyncio.timeout(self.interval):
+                async with db.engine.connect() as conn:
+                    primary_lsn = None
+                    if conn.dialect.name == "postgresql":
+                        primary_lsn = await conn.scalar(PRIMARY_LSN)
+        except (SQLAlchemyError, OSError, TimeoutError) as ex:
+            # Replicas cannot be compared; they go stale after two rounds.
+            logger.warning(f"replicas: primary position unknown: {ex}")
+            return
+        await asyncio.gather(
+            *(
+                replica.check(started, primary_lsn, self.interval)
+                for replica in self.replicas
+            )
+        )
+
+    async def monitor(self) -> None:
+        """Check replica health and lag every interval; run as a task."""
+        while self.replicas:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def status(self) -> dict:
+        return {
+            **self.stats,
+            "replicas": {
+                replica.name: {
+                    "lag": replica.lag,
+                    "healthy": replica in self.healthy(),
+                    **db.pool_stats(replica.engine),
+                }
+                for replica in self.replicas
+            },
+        }
+
+    async def close(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+read_replicas = ReplicaSet(
+    db.Config.DATABASE_REPLICA_URLS,
+    max_lag=db.Config.DB_REPLICA_MAX_LAG,
+    interval=db.Config.DB_REPLICA_CHECK_INTERVAL,
+)
@@ -0,0 +1,48 @@
+from sqlalchemy import Select, func, literal, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product
+from app.utils.rows import as_dicts
+
+# Text search configuration of the generated products.search_vector column
+# (migration 6e836bf4c141); queries must use the same one to hit its index.
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+# Not mapped on Product: it is maintained by Postgres and only read here.
+search_vector = literal_column("products.search_vector", TSVECTOR)
+
+
+def full_text(query: Select, terms: str) -> Select:
+    """Rows matching terms (web search syntax), best ranked first."""
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+    rank = func.ts_rank_cd(search_vector, ts_query)
+    return query.where(search_vector.op("@@")(ts_query)).order_by(
+        rank.desc(), Product.id
+    )
+
+
+def fuzzy(query: Select, terms: str) -> Select:
+    """Rows whose name contains a word similar to terms (pg_trgm)."""
+    similarity = func.word_similarity(terms, Product.name)
+    return query.where(literal(terms).op("<%")(Product.name)).order_by(
+        similarity.desc(), Product.id
+    )
+
+
+def substring(query: Select, terms: str) -> Select:
+    """Plain substring match for databases without text search."""
+    return query.where(Product.name.icontains(terms, autoescape=True))
+
+
+async def search(db: AsyncSession, query: Select, terms: str) -> list[dict]:
+    """Ranked full-text matches, falling back to trigram similarity.
+
+    The fallback runs only when nothing matches, which is the usual sign of
+    a typo, so well-spelled searches cost a single index scan.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return as_dicts(await db.execute(substring(query, terms)))
+    products = as_dicts(await db.execute(full_text(query, terms)))
+    if not products:
+        products = as_dicts(await db.execute(fuzzy(query, terms)))
+    return products
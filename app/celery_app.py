@@ -0,0 +1,77 @@
+"""Celery application, kept free of FastAPI so workers start quickly.
+
+Run the two worker profiles with
+
+    celery -A app.celery_app worker -Q io -P gevent -c 100
+    celery -A app.celery_app worker -Q cpu -P prefork
+    celery -A app.celery_app beat
+"""
+
+from celery import Celery, signals
+from kombu import Queue
+
+from app.config import getenv
+from app.utils import log
+
+
+class Config:
+    BROKER_URL = getenv(
+        "CELERY_BROKER_URL", getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+    )
+    # Unset by default: no task's return value is read by anyone.
+    RESULT_BACKEND = getenv("CELERY_RESULT_BACKEND")
+    # Tasks reserved per worker process beyond the ones running. Tasks are
+    # acknowledged late, so a reserved task is redelivered if the worker
+    # dies; 1 keeps long tasks from queuing behind each other.
+    PREFETCH_MULTIPLIER = int(getenv("CELERY_PREFETCH_MULTIPLIER", 1))
+    RATING_RECONCILE_INTERVAL = float(
+        getenv("RATING_RECONCILE_INTERVAL", 3600)
+    )
+
+
+celery = Celery(
+    "app",
+    broker=Config.BROKER_URL,
+    backend=Config.RESULT_BACKEND,
+    include=["app.tasks"],
+)
+celery.conf.update(
+    broker_connection_retry_on_startup=True,
+    task_ignore_result=True,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=Config.PREFETCH_MULTIPLIER,
+    # "io" is served by a gevent pool: tasks there wait on sockets or
+    # sleep, which gevent's monkey patching makes cooperative. "cpu" is
+    # served by prefork processes, one per core, and also takes tasks that
+    # drive their own asyncio loop, which does not mix with gevent.
+    task_queues=(
+        Queue("io", routing_key="io"),
+        Queue("cpu", routing_key="cpu"),
+    ),
+    task_default_queue="io",
+    task_routes={
+        "app.tasks.reconcile_product_ratings": {"queue": "cpu"},
+        "app.tasks.refresh_product_rating": {"queue": "cpu"},
+    },
+    beat_schedule={
+        "reconcile-product-ratings": {
+            "task": "app.tasks.reconcile_product_ratings",
+            "schedule": Config.RATING_RECONCILE_INTERVAL,
+        },
+    },
+)
+
+
+@signals.worker_init.connect
+@signals.worker_process_init.connect
+def setup_logging(**kwargs):
+    # worker_process_init: prefork children need their own writer thread.
+    log.setup()
+
+
+# Connected here rather than in app.utils.log, so the web app imports
+# Celery only when it first publishes a task.
+signals.before_task_publish.connect(log.add_request_id)
+signals.task_prerun.connect(log.bind_request_id)
+signals.task_postrun.connect(log.unbind_request_id)
@@ -0,0 +1,12 @@
+"""Environment for the API, the Celery worker and scripts.
+
+.env is read once, here; modules take their settings from getenv.
+"""
+
+from os import getenv
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+__all__ = ["getenv"]
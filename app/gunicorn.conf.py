@@ -0,0 +1,38 @@
+"""Gunicorn settings for the production image.
+
+Usage:
+    gunicorn "app.main:create_app()" -c app/gunicorn.conf.py
+
+Prometheus runs in multiprocess mode. prometheus_client decides at
+import time whether samples go to files, so PROMETHEUS_MULTIPROC_DIR comes
+from the container environment (docker-compose.prod.yml) and this file
+does not import prometheus_client: the master would otherwise load it
+first and the forked workers would inherit in-memory values. The
+directory is emptied at startup so samples of a previous run are not
+summed into the new one.
+"""
+
+import os
+import shutil
+
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-metrics"
+)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+worker_class = "uvicorn.workers.UvicornWorker"
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the live gauges (in-flight requests) of the dead worker; its
+    # counters and histograms are kept.
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,26 +1,47 @@
+import asyncio
 import datetime as dt
+import importlib
+from contextlib import asynccontextmanager
 
-from celery import Celery
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+
+from app.backend.db import engine
+from app.backend.replicas import read_replicas
+from app.utils import log, metrics, passwords, query_audit
+from app.utils.cache import product_cache
+from app.utils.compression import CompressionMiddleware
+from app.utils.edge import edge_cache
+from app.utils.observability import ObservabilityMiddleware
+from app.utils.tokens import token_cache
+
+# Imported by create_app(), so importing this module stays cheap.
+ROUTERS = ("category", "products", "auth", "permissions", "reviews", "stats")
+
+origins = ["http://localhost:3000"]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log.setup()
+    caches = (product_cache, token_cache)
+    listeners = [asyncio.create_task(cache.listen()) for cache in caches]
+    listeners.append(asyncio.create_task(read_replicas.monitor()))
+    yield
+    for listener in listeners:
+        listener.cancel()
+    for cache in caches:
+        await cache.close()
+    await edge_cache.close()
+    passwords.shutdown()
+    await read_replicas.close()
+    await engine.dispose()
 
-from app.routers import auth, category, permissions, products, reviews
-from app.tasks import call_background_task
-from app.utils.log import log_middleware
-from app.utils.timing import TimingMiddleware
 
-app = FastAPI()
 app_v1 = FastAPI(title="API v1", description="E-com first API version")
 app_v2 = FastAPI(title="API v2", description="E-com second API version")
 
-celery = Celery(
-    __name__,
-    broker="redis://127.0.0.1:6379/0",
-    backend="redis://127.0.0.1:6379/0",
-    broker_connection_retry_on_startup=True,
-)
-
 
 @app_v1.get("/products")
 async def get_products_v1():
@@ -32,34 +53,52 @@ async def get_products_v2():
     return {"message": "e-commerce API v2"}
 
 
-app.mount("/v1", app_v1)
-app.mount("/v2", app_v2)
-
-app.include_router(category.router)
-app.include_router(products.router)
-app.include_router(auth.router)
-app.include_router(permissions.router)
-app.include_router(reviews.router)
-
-origins = ["http://localhost:3000"]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-app.add_middleware(GZipMiddleware, minimum_size=1000)
-
-app.add_middleware(TimingMiddleware)
-
-app.middleware("http")(log_middleware)
-
-
-@app.get("/")
 async def hello_world(message: str):
+    from app.tasks import call_background_task
+
     call_background_task.apply_async(
         args=[message],
         eta=dt.datetime.now(dt.timezone.utc) + dt.timedelta(minutes=1),
     )
     return {"message": "Hello World!"}
+
+
+def create_app() -> FastAPI:
+    """Build the API; run with `uvicorn --factory app.main:create_app`."""
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    app.mount("/v1", app_v1)
+    app.mount("/v2", app_v2)
+    for name in ROUTERS:
+        router = importlib.import_module(f"app.routers.{name}").router
+        app.include_router(router)
+    app.get("/")(hello_world)
+    app.get("/metrics", include_in_schema=False)(metrics.scrape)
+
+    replica_engines = [replica.engine for replica in read_replicas.replicas]
+    for db_engine in (engine, *replica_engines):
+        metrics.instrument_engine(db_engine)
+        if query_audit.ENABLED:
+            query_audit.instrument(db_engine)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(ObservabilityMiddleware)
+
+    # Outermost, so that strict mode failures are not turned into 500s.
+    if query_audit.ENABLED:
+        app.add_middleware(query_audit.QueryAuditMiddleware)
+    return app
+
+
+def __getattr__(name: str):
+    # "app.main:app" keeps working: the app is built on first access.
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
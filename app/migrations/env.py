@@ -26,6 +26,13 @@ config.set_main_option("sqlalchemy.url", Config.DATABASE_URL)
 # target_metadata = mymodel.Base.metadata
 # target_metadata = None
 target_metadata = Base.metadata
+# Schema objects maintained by hand in migrations and left unmapped on
+# purpose; autogenerate would otherwise emit drops for them.
+UNMAPPED = {"search_vector", "ix_products_search_vector"}
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    return not (reflected and compare_to is None and name in UNMAPPED)
 
 
 # other values from the config, defined by the needs of env.py,
@@ -50,6 +57,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -59,7 +67,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,50 @@
+"""add category materialized path
+
+Revision ID: 1a0ba4718b2f
+Revises: f0d446edda01
+Create Date: 2026-10-17 10:12:31.184022
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a0ba4718b2f'
+down_revision: Union[str, None] = 'f0d446edda01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('path', sa.String(), nullable=True))
+    op.execute(
+        """
+        WITH RECURSIVE tree AS (
+            SELECT id, id::text || '/' AS path
+            FROM categories
+            WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, tree.path || c.id::text || '/'
+            FROM categories c
+            JOIN tree ON c.parent_id = tree.id
+        )
+        UPDATE categories SET path = tree.path
+        FROM tree
+        WHERE categories.id = tree.id
+        """
+    )
+    op.create_index(
+        'ix_categories_path',
+        'categories',
+        ['path'],
+        unique=False,
+        postgresql_ops={'path': 'text_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_categories_path', table_name='categories')
+    op.drop_column('categories', 'path')
@@ -0,0 +1,59 @@
+"""add product search
+
+Revision ID: 6e836bf4c141
+Revises: abaf9c6373ae
+Create Date: 2026-10-17 21:58:12.640317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e836bf4c141'
+down_revision: Union[str, None] = 'abaf9c6373ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VISIBLE = sa.text('is_active = true AND stock > 0')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # search_vector is not mapped on Product (see app.backend.search); env.py
+    # keeps autogenerate from dropping it. Adding a stored generated column
+    # rewrites the table.
+    op.execute(
+        """
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index(
+        'ix_products_search_vector',
+        'products',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_where=VISIBLE,
+    )
+    op.create_index(
+        'ix_products_name_trgm',
+        'products',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+        postgresql_where=VISIBLE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_name_trgm', table_name='products')
+    op.drop_index('ix_products_search_vector', table_name='products')
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,51 @@
+"""add product rating counters
+
+Revision ID: abaf9c6373ae
+Revises: f5132c32abd5
+Create Date: 2026-10-17 12:25:47.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'abaf9c6373ae'
+down_revision: Union[str, None] = 'f5132c32abd5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'products',
+        sa.Column('rating_sum', sa.Float(), server_default='0', nullable=True),
+    )
+    op.add_column(
+        'products',
+        sa.Column(
+            'rating_count', sa.Integer(), server_default='0', nullable=True
+        ),
+    )
+    op.execute(
+        """
+        UPDATE products
+        SET rating_sum = totals.grades,
+            rating_count = totals.count,
+            rating = totals.grades / totals.count
+        FROM (
+            SELECT product_id, sum(grade) AS grades, count(*) AS count
+            FROM ratings
+            WHERE is_active = true
+            GROUP BY product_id
+        ) AS totals
+        WHERE products.id = totals.product_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'rating_count')
+    op.drop_column('products', 'rating_sum')
@@ -0,0 +1,42 @@
+"""add product sort indexes
+
+Revision ID: e7db511ec901
+Revises: 6e836bf4c141
+Create Date: 2026-10-17 22:31:40.118624
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7db511ec901'
+down_revision: Union[str, None] = '6e836bf4c141'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination compares (rating, id) tuples, which skips NULLs.
+    op.execute('UPDATE products SET rating = 0 WHERE rating IS NULL')
+    op.create_index(
+        'ix_products_active_price_id',
+        'products',
+        ['price', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_active = true'),
+    )
+    op.create_index(
+        'ix_products_active_rating_id',
+        'products',
+        ['rating', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_active = true'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_active_rating_id', table_name='products')
+    op.drop_index('ix_products_active_price_id', table_name='products')
@@ -0,0 +1,64 @@
+"""add indexes for hot filter predicates
+
+Revision ID: f5132c32abd5
+Revises: 1a0ba4718b2f
+Create Date: 2026-10-17 11:40:05.517243
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5132c32abd5'
+down_revision: Union[str, None] = '1a0ba4718b2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails if a user already has two reviews of one product; find them with
+    # SELECT user_id, product_id FROM reviews
+    # GROUP BY 1, 2 HAVING count(*) > 1
+    op.create_unique_constraint(
+        'uq_reviews_user_id_product_id', 'reviews', ['user_id', 'product_id']
+    )
+    op.create_index(
+        'ix_reviews_product_id_is_active',
+        'reviews',
+        ['product_id', 'is_active'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_ratings_product_id_is_active',
+        'ratings',
+        ['product_id', 'is_active'],
+        unique=False,
+        postgresql_include=['grade'],
+    )
+    op.create_index(
+        'ix_products_visible_id',
+        'products',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('is_active = true AND stock > 0'),
+    )
+    op.create_index(
+        'ix_products_visible_category_id',
+        'products',
+        ['category_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_active = true AND stock > 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_visible_category_id', table_name='products')
+    op.drop_index('ix_products_visible_id', table_name='products')
+    op.drop_index('ix_ratings_product_id_is_active', table_name='ratings')
+    op.drop_index('ix_reviews_product_id_is_active', table_name='reviews')
+    op.drop_constraint(
+        'uq_reviews_user_id_product_id', 'reviews', type_='unique'
+    )
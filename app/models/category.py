@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -6,12 +6,24 @@ from app.backend.db import Base
 
 class Category(Base):
     __tablename__ = "categories"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # text_pattern_ops lets Postgres use the index for "path LIKE 'x/%'"
+        # regardless of the database collation.
+        Index(
+            "ix_categories_path",
+            "path",
+            postgresql_ops={"path": "text_pattern_ops"},
+        ),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     slug = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
     parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    # Materialized path of ancestor ids including its own, e.g. "1/5/12/".
+    # The whole subtree of a category is "path LIKE '<its path>%'".
+    path = Column(String)
 
     products = relationship("Product", back_populates="category")
@@ -1,4 +1,14 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String
+# isort:skip_file
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -6,6 +16,44 @@ from app.backend.db import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Partial indexes matching the "visible product" predicate used by
+        # every listing (is_active AND stock > 0), ordered for keyset pages.
+        Index(
+            "ix_products_visible_id",
+            "id",
+            postgresql_where=text("is_active = true AND stock > 0"),
+        ),
+        Index(
+            "ix_products_visible_category_id",
+            "category_id",
+            "id",
+            postgresql_where=text("is_active = true AND stock > 0"),
+        ),
+        # Price and rating orders of the listings, scanned in either
+        # direction; stock is checked on the heap so in_stock=false is
+        # served by the same indexes.
+        Index(
+            "ix_products_active_price_id",
+            "price",
+            "id",
+            postgresql_where=text("is_active = true"),
+        ),
+        Index(
+            "ix_products_active_rating_id",
+            "rating",
+            "id",
+            postgresql_where=text("is_active = true"),
+        ),
+        # Typo-tolerant fallback of /products/search (pg_trgm).
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_where=text("is_active = true AND stock > 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -17,6 +65,9 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     supplier_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     rating = Column(Float)
+    # Running totals of active ratings; rating == rating_sum / rating_count.
+    rating_sum = Column(Float, default=0.0, server_default="0")
+    rating_count = Column(Integer, default=0, server_default="0")
     is_active = Column(Boolean, default=True)
 
     category = relationship("Category", back_populates="products")
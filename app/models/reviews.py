@@ -11,13 +11,21 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     Text,
+    UniqueConstraint,
 )
 
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "product_id", name="uq_reviews_user_id_product_id"
+        ),
+        Index("ix_reviews_product_id_is_active", "product_id", "is_active"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -42,6 +50,15 @@ class Review(Base):
 
 class Rating(Base):
     __tablename__ = "ratings"
+    __table_args__ = (
+        # grade is included so AVG(grade) per product is an index-only scan.
+        Index(
+            "ix_ratings_product_id_is_active",
+            "product_id",
+            "is_active",
+            postgresql_include=["grade"],
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     grade = Column(Float, default=0)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -1,25 +1,21 @@
 from datetime import datetime, timedelta, timezone
-from os import getenv
 from typing import Annotated
 
-from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import ExpiredSignatureError, JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_write_db
+from app.config import getenv
 from app.models.user import User
 from app.schemas import CreateUser
+from app.utils.passwords import hash_password, verify_password
+from app.utils.tokens import token_cache
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-
-load_dotenv()
 SECRET_KEY = getenv("SECRET_KEY")
 ALGORITHM = getenv("ALGORITHM")
 
@@ -32,6 +28,8 @@ async def create_access_token(
     is_customer: bool,
     expires_delta: timedelta,
 ):
+    from jose import jwt
+
     encode = {
         "sub": username,
         "id": user_id,
@@ -47,7 +45,7 @@ async def create_access_token(
 
 @router.post("/")
 async def create_user(
-    db: Annotated[AsyncSession, Depends(get_db)], create_user: CreateUser
+    db: Annotated[AsyncSession, Depends(get_write_db)], create_user: CreateUser
 ):
     await db.execute(
         insert(User).values(
@@ -55,7 +53,7 @@ async def create_user(
             last_name=create_user.last_name,
             username=create_user.username,
             email=create_user.email,
-            hashed_password=bcrypt_context.hash(create_user.password),
+            hashed_password=await hash_password(create_user.password),
         )
     )
     await db.commit()
@@ -66,27 +64,29 @@ async def create_user(
 
 
 async def authenticate_user(
-    db: Annotated[AsyncSession, Depends(get_db)], username: str, password: str
+    db: Annotated[AsyncSession, Depends(get_write_db)],
+    username: str,
+    password: str,
 ):
     user = await db.scalar(select(User).where(User.username == username))
-    if (
-        not user
-        or not bcrypt_context.verify(  # noqa W503
-            password, user.hashed_password
-        )
-        or user.is_active == False  # noqa W503
-    ):
+    valid, new_hash = False, None
+    if user and user.is_active:
+        valid, new_hash = await verify_password(password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 
 @router.post("/token")
 async def login(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ):
     user = await authenticate_user(db, form_data.username, form_data.password)
@@ -102,33 +102,16 @@ async def login(
     return {"access_token": token, "token_type": "bearer"}
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+async def decode_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    # jose is imported here rather than at module level: startup and
+    # cached tokens don't need it.
+    from jose import ExpiredSignatureError, JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        user_id: int = payload.get("id")
-        is_admin: bool = payload.get("is_admin")
-        is_supplier: bool = payload.get("is_supplier")
-        is_customer: bool = payload.get("is_customer")
-        expire = payload.get("exp")
-        if username is None or user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate user",
-            )
-        if expire is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No access token supplied",
-            )
-
-        return {
-            "username": username,
-            "id": user_id,
-            "is_admin": is_admin,
-            "is_supplier": is_supplier,
-            "is_customer": is_customer,
-        }
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired!"
@@ -138,6 +121,61 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate user",
         )
+    revoked = await token_cache.is_revoked(token)
+    if revoked is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not check token revocation",
+        )
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+        )
+    if payload.get("exp") is not None:
+        token_cache.set(token, payload)
+    return payload
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    payload = await decode_token(token)
+    username: str = payload.get("sub")
+    user_id: int = payload.get("id")
+    is_admin: bool = payload.get("is_admin")
+    is_supplier: bool = payload.get("is_supplier")
+    is_customer: bool = payload.get("is_customer")
+    expire = payload.get("exp")
+    if username is None or user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate user",
+        )
+    if expire is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No access token supplied",
+        )
+
+    return {
+        "username": username,
+        "id": user_id,
+        "is_admin": is_admin,
+        "is_supplier": is_supplier,
+        "is_customer": is_customer,
+    }
+
+
+@router.post("/logout")
+async def logout(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    payload = await decode_token(token)
+    await token_cache.revoke(token, payload["exp"])
+    return {
+        "status_code": status.HTTP_200_OK,
+        "transaction": "Token revoked",
+    }
 
 
 @router.get("/read_current_user")
@@ -2,45 +2,90 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from slugify import slugify
-from sqlalchemy import insert, select
+from sqlalchemy import Select, func, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_read_db, get_write_db
 from app.models import Category
 from app.routers.auth import get_current_user
-from app.schemas import CreateCategory
+from app.schemas import CategoryOut, CreateCategory
+from app.utils import versions
+from app.utils.compression import compression
+from app.utils.query_audit import query_budget
+from app.utils.rows import as_dicts
 
 router = APIRouter(prefix="/categories", tags=["Category"])
 
 
-@router.get("/")
+async def parent_path(db: AsyncSession, parent_id: int | None) -> str:
+    if parent_id is None:
+        return ""
+    parent = await db.scalar(select(Category).where(Category.id == parent_id))
+    if parent is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parent category not found",
+        )
+    return parent.path
+
+
+async def category_subtree(db: AsyncSession, slug: str) -> Select:
+    """Ids of the category with this slug and all of its descendants."""
+    category = await db.scalar(select(Category).where(Category.slug == slug))
+    if not category:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Category {slug} not found",
+        )
+    return select(Category.id).where(Category.path.startswith(category.path))
+
+
+@router.get(
+    "/",
+    response_model=list[CategoryOut],
+    dependencies=[
+        Depends(versions.conditional_get(versions.CATEGORIES)),
+        Depends(query_budget(1)),
+        Depends(compression("max")),
+    ],
+)
 async def get_all_categories(
     db: Annotated[
         AsyncSession,
-        Depends(get_db),
+        Depends(get_read_db),
     ]
 ):
-    categories = await db.scalars(
-        select(Category).where(Category.is_active == True)
+    columns = [getattr(Category, name) for name in CategoryOut.model_fields]
+    categories = await db.execute(
+        select(*columns).where(Category.is_active == True)
     )
-    return categories.all()
+    return as_dicts(categories)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_category(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     create_category: CreateCategory,
     get_user: Annotated[dict, Depends(get_current_user)],
 ):
     if get_user.get("is_admin"):
-        await db.execute(
-            insert(Category).values(
+        path = await parent_path(db, create_category.parent_id)
+        category_id = await db.scalar(
+            insert(Category)
+            .values(
                 name=create_category.name,
                 parent_id=create_category.parent_id,
                 slug=slugify(create_category.name),
             )
+            .returning(Category.id)
+        )
+        await db.execute(
+            update(Category)
+            .where(Category.id == category_id)
+            .values(path=f"{path}{category_id}/")
         )
         await db.commit()
+        await versions.bump(versions.CATEGORIES)
         return {
             "status_code": status.HTTP_201_CREATED,
             "transaction": "Sucessful",
@@ -54,7 +99,7 @@ async def create_category(
 
 @router.put("/")
 async def update_category(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     category_id: int,
     update_category: CreateCategory,
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -68,10 +113,30 @@ async def update_category(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Category not found",
             )
+        old_path = category.path
+        new_path = (
+            f"{await parent_path(db, update_category.parent_id)}{category.id}/"
+        )
+        if new_path != old_path and new_path.startswith(old_path):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Category can't be moved into its own subtree",
+            )
         category.name = update_category.name
         category.slug = slugify(update_category.name)
         category.parent_id = update_category.parent_id
+        if new_path != old_path:
+            # Re-root the whole subtree in one statement.
+            rest = func.substr(Category.path, len(old_path) + 1)
+            await db.execute(
+                update(Category)
+                .where(Category.path.startswith(old_path))
+                .values(path=literal(new_path) + rest)
+                .execution_options(synchronize_session=False)
+            )
+            category.path = new_path
         await db.commit()
+        await versions.bump(versions.CATEGORIES)
         return {
             "status_code": status.HTTP_200_OK,
             "transaction": "Category update succeded",
@@ -85,7 +150,7 @@ async def update_category(
 
 @router.delete("/")
 async def delete_category(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     category_id: int,
     get_user: Annotated[dict, Depends(get_current_user)],
 ):
@@ -100,6 +165,7 @@ async def delete_category(
             )
         category.is_active = False
         await db.commit()
+        await versions.bump(versions.CATEGORIES)
         return {
             "status_code": status.HTTP_200_OK,
             "transaction": "Category deleted",
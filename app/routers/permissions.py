@@ -5,7 +5,7 @@ from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_write_db
 from app.models import User
 from app.routers.auth import get_current_user
 
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/permissions", tags=["Persmissions"])
 
 @router.patch("/")
 async def supplier_permission(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
     user_id: int,
 ):
@@ -56,7 +56,7 @@ async def supplier_permission(
 
 @router.delete("/delete")
 async def delete_user(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
     user_id: int,
 ):
@@ -106,3 +106,20 @@ def role_required(allowed_roles: List[str]):
         return get_user
 
     return check_role
+
+
+def export_supplier(
+    get_user: Annotated[
+        dict, Depends(role_required(["is_admin", "is_supplier"]))
+    ],
+    supplier_id: int | None = None,
+) -> int | None:
+    """Supplier an export is limited to: suppliers only see their own."""
+    if get_user.get("is_admin"):
+        return supplier_id
+    if supplier_id is not None and supplier_id != get_user.get("id"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Suppliers can only export their own products",
+        )
+    return get_user.get("id")
@@ -1,35 +1,134 @@
-from typing import Annotated
+from collections import Counter
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import ValidationError
 from slugify import slugify
-from sqlalchemy import insert, select
+from sqlalchemy import case, func, insert, literal_column, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_read_db, get_write_db, read_sessionmaker
+from app.backend.search import search
 from app.models import Category, Product
 from app.routers.auth import get_current_user
-from app.schemas import CreateProduct
+from app.routers.category import category_subtree
+from app.routers.permissions import export_supplier
+from app.schemas import CreateProduct, Facets, Page, ProductOut
+from app.utils import versions
+from app.utils.bulk import insert_ignoring_conflicts, iter_records
+from app.utils.cache import product_cache
+from app.utils.compression import compression
+from app.utils.pagination import DEFAULT_LIMIT, MAX_LIMIT, keyset, paginate
+from app.utils.query_audit import query_budget
+from app.utils.rows import first_dict
+from app.utils.streaming import export_response, ndjson_response
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+IMPORT_BATCH_SIZE = 1000
 
-@router.get("/")
-async def all_products(db: Annotated[AsyncSession, Depends(get_db)]):
-    products = await db.scalars(
-        select(Product).where(Product.is_active == True, Product.stock > 0)
+# stock is compared with an inline literal rather than a bound parameter so
+# that Postgres can match the partial ix_products_visible_* indexes even
+# when asyncpg ends up with a generic prepared plan.
+in_stock_products = Product.stock > literal_column("0")
+visible_products = (Product.is_active == True, in_stock_products)
+# Listings select only the public columns and are served from row tuples.
+product_columns = [getattr(Product, name) for name in ProductOut.model_fields]
+
+# Keyset keys and direction of each listing order. Every order is served by
+# an index scan: ix_products_visible_id / the primary key for id and newest
+# (ids grow with insertion), ix_products_active_price_id and
+# ix_products_active_rating_id (scanned backwards when descending).
+SORTS = {
+    "id": ([Product.id], False),
+    "newest": ([Product.id], True),
+    "price": ([Product.price, Product.id], False),
+    "-price": ([Product.price, Product.id], True),
+    "rating": ([Product.rating, Product.id], False),
+    "-rating": ([Product.rating, Product.id], True),
+}
+Sort = Literal["id", "newest", "price", "-price", "rating", "-rating"]
+# Lower bounds of the price facet buckets; the last one is open-ended.
+PRICE_BUCKETS = (0, 500, 1000, 5000, 10000, 50000)
+
+
+def product_filters(
+    min_price: Annotated[int | None, Query(ge=0)] = None,
+    max_price: Annotated[int | None, Query(ge=0)] = None,
+    min_rating: Annotated[float | None, Query(ge=0, le=10)] = None,
+    supplier_id: int | None = None,
+    in_stock: bool = True,
+) -> list:
+    """WHERE criteria of a product listing from its query parameters."""
+    criteria = [Product.is_active == True]
+    if in_stock:
+        criteria.append(in_stock_products)
+    if min_price is not None:
+        criteria.append(Product.price >= min_price)
+    if max_price is not None:
+        criteria.append(Product.price <= max_price)
+    if min_rating is not None:
+        criteria.append(Product.rating >= min_rating)
+    if supplier_id is not None:
+        criteria.append(Product.supplier_id == supplier_id)
+    return criteria
+
+
+async def list_products(
+    request: Request,
+    db: AsyncSession,
+    query,
+    cursor: str | None,
+    limit: int,
+    stream: bool,
+    sort: str = "id",
+):
+    keys, descending = SORTS[sort]
+    if stream:
+        return ndjson_response(
+            keyset(query, keys, cursor, sort, descending),
+            read_sessionmaker(request),
+        )
+    return await paginate(db, query, keys, cursor, limit, sort, descending)
+
+
+@router.get(
+    "/",
+    response_model=Page[ProductOut],
+    dependencies=[
+        Depends(versions.conditional_get(versions.CATALOG)),
+        Depends(query_budget(1)),
+    ],
+)
+async def all_products(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    filters: Annotated[list, Depends(product_filters)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_LIMIT)] = DEFAULT_LIMIT,
+    stream: bool = False,
+    sort: Sort = "id",
+):
+    page = await list_products(
+        request,
+        db,
+        select(*product_columns).where(*filters),
+        cursor,
+        limit,
+        stream,
+        sort,
     )
-    # TODO: проверить. Нужно заменить на products.all()
-    if not products:
+    if not stream and not page["items"] and cursor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="There are not products",
         )
-    return products.all()
+    return page
 
 
 @router.post("/")
 async def create_product(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     create_product: CreateProduct,
     get_user: Annotated[dict, Depends(get_current_user)],
 ):
@@ -56,6 +155,7 @@ async def create_product(
             )
         )
         await db.commit()
+        await versions.bump(versions.CATALOG)
         return {
             "status_code": status.HTTP_201_CREATED,
             "transaction": "Successful",
@@ -67,45 +167,270 @@ async def create_product(
         )
 
 
-@router.get("/{category_slug}")
-async def product_by_category(
-    category_slug: str, db: Annotated[AsyncSession, Depends(get_db)]
-):
-    category = await db.scalar(
-        select(Category).where(Category.slug == category_slug)
+def validation_detail(ex: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+        for error in ex.errors()
     )
-    if not category:
+
+
+async def write_import_batch(
+    db: AsyncSession, batch: list[tuple[int, dict]], report: dict
+) -> None:
+    """Insert a batch in one statement; slugs already taken are skipped."""
+    created = set(
+        await db.scalars(
+            insert_ignoring_conflicts(db, Product, ["slug"])
+            .values([values for _, values in batch])
+            .returning(Product.slug)
+        )
+    )
+    await db.commit()
+    if created:
+        await versions.bump(versions.CATALOG)
+    for row, values in batch:
+        status_ = "created" if values["slug"] in created else "duplicate"
+        report[status_] += 1
+        report["rows"].append(
+            {"row": row, "status": status_, "slug": values["slug"]}
+        )
+
+
+@router.post("/import")
+async def import_products(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_write_db)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """Bulk create products from a streamed CSV or NDJSON upload.
+
+    CSV needs a header row with the CreateProduct field names. Rows are
+    validated one by one and written in multi-row INSERT ... ON CONFLICT
+    batches; the response reports the outcome of every row.
+    """
+    if not (get_user.get("is_supplier") or get_user.get("is_admin")):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Category {category_slug} not found",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You have not enough permission for this action",
         )
-    subcategories = await db.scalars(
-        select(Category).where(Category.parent_id == category.id)
+    records = iter_records(
+        request.headers.get("content-type", ""), request.stream()
     )
-    all_categories_ids = list()
-    if subcategories:
-        all_categories_ids.extend([cat.id for cat in subcategories.all()])
-    all_categories_ids.append(category.id)
-    res = await db.scalars(
-        select(Product).where(
-            Product.category_id.in_(all_categories_ids),
-            Product.is_active == True,
-            Product.stock > 0,
+    if records is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be text/csv or application/x-ndjson",
         )
+    category_ids = set(await db.scalars(select(Category.id)))
+    report = {"created": 0, "duplicate": 0, "invalid": 0, "rows": []}
+    seen_slugs = set()
+    batch = []
+    row = 0
+    async for record, error in records:
+        row += 1
+        if error is None:
+            try:
+                product = CreateProduct.model_validate(record)
+            except ValidationError as ex:
+                error = validation_detail(ex)
+            else:
+                if product.category not in category_ids:
+                    error = "There is no category found"
+        if error is not None:
+            report["invalid"] += 1
+            report["rows"].append(
+                {"row": row, "status": "invalid", "detail": error}
+            )
+            continue
+        slug = slugify(product.name)
+        if slug in seen_slugs:
+            report["duplicate"] += 1
+            report["rows"].append(
+                {"row": row, "status": "duplicate", "slug": slug}
+            )
+            continue
+        seen_slugs.add(slug)
+        batch.append(
+            (
+                row,
+                {
+                    "name": product.name,
+                    "description": product.description,
+                    "price": product.price,
+                    "image_url": product.image_url,
+                    "stock": product.stock,
+                    "category_id": product.category,
+                    "rating": 0.0,
+                    "slug": slug,
+                    "supplier_id": get_user.get("id"),
+                },
+            )
+        )
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await write_import_batch(db, batch, report)
+            batch = []
+    if batch:
+        await write_import_batch(db, batch, report)
+    report["rows"].sort(key=lambda result: result["row"])
+    return report
+
+
+@router.get("/export", dependencies=[Depends(compression("fast"))])
+async def export_products(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    supplier_id: Annotated[int | None, Depends(export_supplier)],
+    export_format: Annotated[
+        Literal["ndjson", "csv"], Query(alias="format")
+    ] = "ndjson",
+    category: str | None = None,
+):
+    """Stream every visible product, for marketplace and price feeds.
+
+    Rows come from a server-side cursor, so memory use does not grow with
+    the size of the catalog.
+    """
+    query = select(*product_columns, Product.supplier_id).where(
+        *visible_products
+    )
+    if category is not None:
+        subtree = await category_subtree(db, category)
+        query = query.where(Product.category_id.in_(subtree))
+    if supplier_id is not None:
+        query = query.where(Product.supplier_id == supplier_id)
+    return export_response(
+        query.order_by(Product.id),
+        export_format,
+        "products",
+        read_sessionmaker(request),
+    )
+
+
+@router.get(
+    "/facets",
+    response_model=Facets,
+    dependencies=[
+        Depends(
+            versions.conditional_get(versions.CATALOG, versions.CATEGORIES)
+        ),
+        Depends(query_budget(2)),
+    ],
+)
+async def product_facets(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    filters: Annotated[list, Depends(product_filters)],
+    category: str | None = None,
+):
+    """Product counts per category and per price bucket.
+
+    Both facets come from one GROUP BY over (category, bucket); the few
+    resulting rows are summed up per facet here.
+    """
+    bucket = case(
+        *(
+            (Product.price >= low, index)
+            for index, low in reversed(list(enumerate(PRICE_BUCKETS)))
+        ),
+        else_=0,
+    ).label("bucket")
+    query = (
+        select(Product.category_id, bucket, func.count().label("count"))
+        .where(*filters)
+        .group_by(Product.category_id, bucket)
     )
-    return res.all()
+    if category is not None:
+        subtree = await category_subtree(db, category)
+        query = query.where(Product.category_id.in_(subtree))
+    categories, prices = Counter(), Counter()
+    for category_id, index, count in await db.execute(query):
+        categories[category_id] += count
+        prices[index] += count
+    bounds = PRICE_BUCKETS[1:] + (None,)
+    return {
+        "categories": [
+            {"category_id": category_id, "count": count}
+            for category_id, count in sorted(categories.items())
+        ],
+        "prices": [
+            {"min": PRICE_BUCKETS[index], "max": bounds[index], "count": count}
+            for index, count in sorted(prices.items())
+        ],
+    }
 
 
-@router.get("/detail/{product_slug}")
+@router.get(
+    "/search",
+    response_model=list[ProductOut],
+    dependencies=[
+        Depends(versions.conditional_get(versions.CATALOG)),
+        Depends(query_budget(2)),
+    ],
+)
+async def search_products(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    q: Annotated[str, Query(min_length=2, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=MAX_LIMIT)] = DEFAULT_LIMIT,
+):
+    query = select(*product_columns).where(*visible_products).limit(limit)
+    return await search(db, query, q.strip())
+
+
+@router.get(
+    "/{category_slug}",
+    response_model=Page[ProductOut],
+    dependencies=[
+        Depends(
+            versions.conditional_get(versions.CATALOG, versions.CATEGORIES)
+        ),
+        Depends(query_budget(2)),
+    ],
+)
+async def product_by_category(
+    request: Request,
+    category_slug: str,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    filters: Annotated[list, Depends(product_filters)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_LIMIT)] = DEFAULT_LIMIT,
+    stream: bool = False,
+    sort: Sort = "id",
+):
+    subtree = await category_subtree(db, category_slug)
+    query = select(*product_columns).where(
+        Product.category_id.in_(subtree), *filters
+    )
+    return await list_products(request, db, query, cursor, limit, stream, sort)
+
+
+@router.get(
+    "/detail/{product_slug}",
+    response_model=ProductOut,
+    dependencies=[
+        Depends(versions.conditional_get(versions.product("{product_slug}"))),
+        Depends(query_budget(1)),
+        Depends(compression("max")),
+    ],
+)
 async def product_detail(
-    product_slug: str, db: Annotated[AsyncSession, Depends(get_db)]
+    request: Request,
+    product_slug: str,
+    db: Annotated[AsyncSession, Depends(get_write_db)],
 ):
-    product = await db.scalar(
-        select(Product).where(
-            Product.slug == product_slug,
-            Product.is_active == True,
-            Product.stock > 0,
+    async def load():
+        # From the primary: in product_cache, a row from a lagging replica
+        # would outlive the invalidation of its write.
+        product = await db.execute(
+            select(*product_columns).where(
+                Product.slug == product_slug, *visible_products
+            )
         )
+        return first_dict(product)
+
+    # An edge refresh can reach a worker before the invalidation of the
+    # write that caused it; nginx would keep that copy for the long TTL.
+    refresh = "x-cache-refresh" in request.headers
+    product = await product_cache.get_or_load(
+        product_slug, load, skip_local=refresh
     )
     if not product:
         raise HTTPException(
@@ -117,7 +442,7 @@ async def product_detail(
 
 @router.put("/detail/{product_slug}")
 async def update_product(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     product_slug: str,
     update_product_model: CreateProduct,
     get_user: Annotated[dict, Depends(get_current_user)],
@@ -153,6 +478,12 @@ async def update_product(
             product_update.slug = slugify(update_product_model.name)
 
             await db.commit()
+            await product_cache.invalidate(product_slug, product_update.slug)
+            await versions.bump(
+                versions.CATALOG,
+                versions.product(product_slug),
+                versions.product(product_update.slug),
+            )
             return {
                 "status_code": status.HTTP_200_OK,
                 "transaction": "Product update is successful",
@@ -172,7 +503,7 @@ async def update_product(
 
 @router.delete("/")
 async def delete_product(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     product_slug: str,
     get_user: Annotated[dict, Depends(get_current_user)],
 ):
@@ -191,6 +522,10 @@ async def delete_product(
         ):
             product_delete.is_active = False
             await db.commit()
+            await product_cache.invalidate(product_slug)
+            await versions.bump(
+                versions.CATALOG, versions.product(product_slug)
+            )
             return {
                 "status_code": status.HTTP_200_OK,
                 "transaction": "Product delete is successful",
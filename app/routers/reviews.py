@@ -1,36 +1,42 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Path, status
-from sqlalchemy import exists, func, select, update
-from sqlalchemy.exc import SQLAlchemyError
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.requests import Request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm import selectinload
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_read_db, get_write_db, read_sessionmaker
+from app.backend.ratings import schedule_rating_refresh
 from app.models import Product, Rating, Review
-from app.routers.permissions import role_required
-from app.schemas import CreateReview
+from app.routers.category import category_subtree
+from app.routers.permissions import export_supplier, role_required
+from app.schemas import CreateReview, ReviewOut
+from app.utils import versions
+from app.utils.compression import compression
+from app.utils.query_audit import query_budget
+from app.utils.rows import as_dicts
+from app.utils.streaming import export_response
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 
-@router.get("/")
-async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
-    reviews = await db.scalars(
-        select(Review)
-        .options(selectinload(Review.rating).load_only(Rating.grade))
-        .where(Review.is_active == True)
-        .options(
-            load_only(
-                Review.id,
-                Review.product_id,
-                Review.comment,
-                Review.user_id,
-                Review.comment_date,
-            )
-        )
-    )
-    reviews_res = reviews.all()
+# Reviews are served from row tuples with the grade joined in.
+review_query = select(
+    Review.id,
+    Review.user_id,
+    Review.product_id,
+    Review.comment,
+    Review.comment_date,
+    Rating.grade,
+).join(Rating, Review.rating_id == Rating.id)
+
+
+@router.get("/", response_model=list[ReviewOut])
+async def all_reviews(db: Annotated[AsyncSession, Depends(get_read_db)]):
+    reviews = await db.execute(review_query.where(Review.is_active == True))
+    reviews_res = as_dicts(reviews)
     if not reviews_res:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,17 +45,51 @@ async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
     return reviews_res
 
 
-@router.get("/{product_slug}/")
+@router.get("/export", dependencies=[Depends(compression("fast"))])
+async def export_reviews(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    supplier_id: Annotated[int | None, Depends(export_supplier)],
+    export_format: Annotated[
+        Literal["ndjson", "csv"], Query(alias="format")
+    ] = "ndjson",
+    category: str | None = None,
+):
+    """Stream active reviews, optionally of one category subtree."""
+    query = review_query.where(Review.is_active == True)
+    if category is not None or supplier_id is not None:
+        query = query.join(Product, Review.product_id == Product.id)
+    if category is not None:
+        subtree = await category_subtree(db, category)
+        query = query.where(Product.category_id.in_(subtree))
+    if supplier_id is not None:
+        query = query.where(Product.supplier_id == supplier_id)
+    return export_response(
+        query.order_by(Review.id),
+        export_format,
+        "reviews",
+        read_sessionmaker(request),
+    )
+
+
+@router.get(
+    "/{product_slug}/",
+    response_model=list[ReviewOut],
+    dependencies=[
+        Depends(versions.conditional_get(versions.product("{product_slug}"))),
+        Depends(query_budget(2)),
+    ],
+)
 async def product_reviews(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     product_slug: Annotated[str, Path()],
 ):
-    product = await db.scalar(
-        select(Product).where(
+    product_id = await db.scalar(
+        select(Product.id).where(
             Product.slug == product_slug, Product.is_active == True
         ),
     )
-    if not product:
+    if not product_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=(
@@ -57,17 +97,12 @@ async def product_reviews(
                 "not found or product.is_active==False"
             ),
         )
-    reviews = await db.scalars(
-        select(Review)
-        .options(selectinload(Review.rating).load_only(Rating.grade))
-        .where(Review.is_active == True, Review.product_id == product.id)
-        .options(
-            load_only(
-                Review.comment, Review.id, Review.user_id, Review.comment_date
-            )
+    reviews = await db.execute(
+        review_query.where(
+            Review.is_active == True, Review.product_id == product_id
         )
     )
-    reviews_all = reviews.all()
+    reviews_all = as_dicts(reviews)
     if not reviews_all:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,7 +113,7 @@ async def product_reviews(
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def add_review(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     create_review: CreateReview,
     cur_user: Annotated[dict, Depends(role_required(["is_customer"]))],
 ):
@@ -87,26 +122,13 @@ async def add_review(
             user_id = cur_user.get("id")
             product_id = create_review.product_id
             check_product_exists = await db.scalar(
-                select(Product).where(Product.id == product_id)
+                select(Product.id).where(Product.id == product_id)
             )
             if not check_product_exists:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="There is no product with product_id provided",
                 )
-            check_review_exists = await db.scalar(
-                select(
-                    exists().where(
-                        Review.user_id == user_id,
-                        Review.product_id == product_id,
-                    )
-                )
-            )
-            if check_review_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="User already submitted a review for this product",
-                )
             new_rating_obj = Rating(
                 grade=create_review.grade,
                 user_id=user_id,
@@ -119,35 +141,36 @@ async def add_review(
                 rating=new_rating_obj,
             )
             db.add(new_review_obj)
-            avg_rating = await db.scalar(
-                select(func.avg(Rating.grade)).where(
-                    Rating.product_id == product_id, Rating.is_active == True
-                )
+            # uq_reviews_user_id_product_id rejects a second review
+            await db.flush()
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User already submitted a review for this product",
             )
-            if avg_rating is not None:
-                await db.execute(
-                    update(Product)
-                    .where(Product.id == product_id)
-                    .values(rating=avg_rating)
-                )
-                return {
-                    "status_code": status.HTTP_201_CREATED,
-                    "transaction": "Successful",
-                }
         except SQLAlchemyError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail=f"error:\n {e}"
             )
+    # The product row, its rating and cached copies are updated by a
+    # coalesced background refresh.
+    await schedule_rating_refresh(db, product_id, create_review.grade, 1)
+    return {
+        "status_code": status.HTTP_201_CREATED,
+        "transaction": "Successful",
+    }
 
 
 @router.delete("/{product_slug}/{review_id}")
 async def delete_review(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_write_db)],
     cur_user: Annotated[dict, Depends(role_required(["is_admin"]))],
     review_id: int,
 ):
     review = await db.scalar(
-        select(Review).where(Review.id == review_id, Review.is_active == True)
+        select(Review)
+        .options(selectinload(Review.rating))
+        .where(Review.id == review_id, Review.is_active == True)
     )
     if not review:
         raise HTTPException(
@@ -155,7 +178,12 @@ async def delete_review(
             detail="There is no reviw found",
         )
     review.is_active = False
+    grade, count = 0.0, 0
+    if review.rating is not None and review.rating.is_active:
+        review.rating.is_active = False
+        grade, count = -review.rating.grade, -1
     await db.commit()
+    await schedule_rating_refresh(db, review.product_id, grade, count)
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Review deleted successfully",
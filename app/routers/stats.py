@@ -0,0 +1,52 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from app.backend import ratings
+from app.backend.db import engine, pool_stats
+from app.backend.replicas import read_replicas
+from app.routers.permissions import role_required
+from app.utils import compression, query_audit
+from app.utils.cache import product_cache
+from app.utils.edge import edge_cache
+from app.utils.tokens import token_cache
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@router.get("/cache")
+async def cache_stats(
+    get_user: Annotated[dict, Depends(role_required(["is_admin"]))],
+):
+    return {
+        product_cache.namespace: {
+            **product_cache.stats,
+            "local_size": len(product_cache.local),
+        },
+        "token": {**token_cache.stats, "local_size": len(token_cache.claims)},
+        "edge": edge_cache.stats,
+        "compression": {
+            **compression.stats,
+            "variants": len(compression.variants),
+        },
+        "rating_refresh": ratings.pending_rating_refreshes.stats,
+        "rating_delta": ratings.pending_rating_deltas.stats,
+    }
+
+
+@router.get("/db")
+async def db_stats(
+    get_user: Annotated[dict, Depends(role_required(["is_admin"]))],
+):
+    return {
+        **pool_stats(engine),
+        "replicas": read_replicas.status(),
+    }
+
+
+@router.get("/queries")
+async def query_stats(
+    get_user: Annotated[dict, Depends(role_required(["is_admin"]))],
+):
+    """Per-route query audit summary (QUERY_AUDIT=warn|strict only)."""
+    return {"mode": query_audit.MODE, "routes": query_audit.report()}
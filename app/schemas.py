@@ -1,5 +1,10 @@
+import datetime as dt
+from typing import Generic, TypeVar
+
 from pydantic import BaseModel, field_validator
 
+T = TypeVar("T")
+
 
 class CreateProduct(BaseModel):
     name: str
@@ -33,3 +38,53 @@ class CreateReview(BaseModel):
         if not 1 <= value <= 10:
             raise ValueError("Grade must be beteen 1-10")
         return value
+
+
+class ProductOut(BaseModel):
+    id: int
+    name: str
+    slug: str
+    description: str | None
+    price: int
+    image_url: str | None
+    stock: int
+    category_id: int
+    rating: float | None
+    rating_count: int | None
+
+
+class CategoryOut(BaseModel):
+    id: int
+    name: str
+    slug: str
+    parent_id: int | None
+
+
+class ReviewOut(BaseModel):
+    id: int
+    user_id: int
+    product_id: int
+    comment: str
+    comment_date: dt.datetime | None
+    grade: float
+
+
+class CategoryFacet(BaseModel):
+    category_id: int
+    count: int
+
+
+class PriceFacet(BaseModel):
+    min: int
+    max: int | None
+    count: int
+
+
+class Facets(BaseModel):
+    categories: list[CategoryFacet]
+    prices: list[PriceFacet]
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next: str | None
@@ -1,10 +1,94 @@
+import asyncio
 import time
+from typing import Awaitable, Callable
 
-from celery import shared_task
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 
+from app.backend import ratings
+from app.backend.db import Config, engine_options
+from app.celery_app import celery
+from app.utils import versions
+from app.utils.cache import product_cache
+from app.utils.edge import edge_cache
 
-@shared_task()
+
+def run_in_session(fn: Callable[[AsyncSession], Awaitable]):
+    """Run fn(session) to completion from a synchronous Celery task.
+
+    Every call gets its own event loop, so the app's pooled engine (bound
+    to another loop) can't be reused; a NullPool engine is created instead.
+    """
+
+    async def runner():
+        options = engine_options(Config.DATABASE_URL)
+        engine = create_async_engine(
+            Config.DATABASE_URL,
+            poolclass=NullPool,
+            echo=options["echo"],
+            connect_args=options.get("connect_args", {}),
+        )
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                result = await fn(session)
+                await session.commit()
+                return result
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(runner())
+
+
+@celery.task()
 def call_background_task(message):
+    # Runs on the "io" queue, where gevent makes time.sleep cooperative.
     time.sleep(10)
     print("Background task 1!")
     print(message)
+
+
+async def refresh_products(slugs: list[str]) -> None:
+    """Drop cached copies of products changed outside a request.
+
+    Redis clients are bound to the task's event loop, so they are closed
+    before the loop is.
+    """
+    try:
+        await product_cache.invalidate(*slugs)
+        await versions.bump(
+            versions.CATALOG, *(versions.product(slug) for slug in slugs)
+        )
+    finally:
+        await product_cache.close()
+        await versions.counters.close()
+        await edge_cache.close()
+
+
+@celery.task()
+def reconcile_product_ratings():
+    async def reconcile(db: AsyncSession) -> int:
+        slugs = await ratings.reconcile_ratings(db)
+        await db.commit()
+        if slugs:
+            await refresh_products(slugs)
+        return len(slugs)
+
+    return run_in_session(reconcile)
+
+
+@celery.task()
+def refresh_product_rating(product_id: int):
+    async def refresh(db: AsyncSession) -> None:
+        # Released before the changes are taken: anything buffered after
+        # this point schedules another run instead of being missed.
+        try:
+            await ratings.pending_rating_refreshes.release(str(product_id))
+            slug = await ratings.apply_pending_delta(db, product_id)
+        finally:
+            await ratings.pending_rating_refreshes.close()
+            await ratings.pending_rating_deltas.close()
+        await db.commit()
+        if slug is not None:
+            await refresh_products([slug])
+
+    run_in_session(refresh)
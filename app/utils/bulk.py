@@ -0,0 +1,97 @@
+import codecs
+import csv
+from typing import AsyncIterator
+
+import orjson
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CSV_TYPES = {"text/csv", "application/csv"}
+NDJSON_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/json-lines",
+}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed UTF-8 body into lines without buffering all of it."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+# Record iterators yield (record, None), or (None, error) for a row that
+# can't be parsed, so one bad row doesn't abort the whole upload.
+Records = AsyncIterator[tuple[dict | None, str | None]]
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> Records:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as ex:
+            yield None, f"Invalid JSON: {ex}"
+            continue
+        if isinstance(record, dict):
+            yield record, None
+        else:
+            yield None, "Expected a JSON object"
+
+
+async def iter_csv(lines: AsyncIterator[str]) -> Records:
+    """CSV records as dicts keyed by the header row.
+
+    Lines are joined while a quoted field is still open, so values with
+    embedded newlines survive the line-by-line split.
+    """
+    header = None
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        if record.strip():
+            try:
+                values = next(csv.reader([record]))
+            except csv.Error as ex:
+                yield None, f"Invalid CSV: {ex}"
+                record = ""
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+            elif len(values) != len(header):
+                yield None, f"Expected {len(header)} columns"
+            else:
+                yield dict(zip(header, values)), None
+        record = ""
+
+
+def iter_records(
+    content_type: str, chunks: AsyncIterator[bytes]
+) -> Records | None:
+    """Records of a CSV or NDJSON upload; None for other content types."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return iter_csv(iter_lines(chunks))
+    if media_type in NDJSON_TYPES:
+        return iter_ndjson(iter_lines(chunks))
+    return None
+
+
+def insert_ignoring_conflicts(db: AsyncSession, table, index_elements):
+    """INSERT ... ON CONFLICT DO NOTHING for the session's dialect."""
+    dialect = sqlite if db.bind.dialect.name == "sqlite" else postgresql
+    return dialect.insert(table).on_conflict_do_nothing(
+        index_elements=index_elements
+    )
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import getenv
+
+_MISSING = object()
+
+# SET KEYS[1] to ARGV[2] for ARGV[3] seconds, unless KEYS[1] was
+# invalidated (its generation counter KEYS[2] changed from ARGV[1]).
+_FILL_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return false
+"""
+
+
+class LRUCache:
+    """Bounded in-process LRU with a per-entry time to live."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key, default=None):
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBacked:
+    """Shared Redis plumbing: lazy client, error backoff and pub/sub.
+
+    Redis is optional (no redis_url means process-local only). A Redis
+    error is logged, counted and pauses Redis use for retry_after seconds
+    so callers can degrade instead of failing the request.
+    """
+
+    retry_after = 5.0
+
+    def __init__(self, namespace: str, redis_url: str | None = None):
+        self.namespace = namespace
+        self.redis_url = redis_url
+        self.channel = f"{namespace}:invalidate"
+        self.stats = {"redis_errors": 0}
+        self._redis = None
+        self._down_until = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _client(self):
+        if self.redis_url is None or time.monotonic() < self._down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    def _redis_failed(self, ex: Exception) -> None:
+        self.stats["redis_errors"] += 1
+        self._down_until = time.monotonic() + self.retry_after
+        logger.warning(f"{self.namespace} cache: redis unavailable: {ex}")
+
+    def on_invalidate(self, key: str) -> None:
+        """Drop the local copy of key; a no-op without a local tier."""
+
+    def on_listener_lost(self) -> None:
+        """Invalidations published while disconnected are lost."""
+
+    async def listen(self) -> None:
+        """Apply invalidations published by other workers; run as a task."""
+        if self.redis_url is None:
+            return
+        while True:
+            try:
+                pubsub = aioredis.Redis.from_url(self.redis_url).pubsub()
+                async with pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.on_invalidate(message["data"].decode())
+            except RedisError as ex:
+                logger.warning(f"{self.namespace} cache: listener: {ex}")
+                self.on_listener_lost()
+                await asyncio.sleep(self.retry_after)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+class TwoTierCache(RedisBacked):
+    """Read-through cache: in-process LRU in front of a shared Redis tier.
+
+    Values must be JSON serializable. Invalidations delete the key from
+    Redis and are broadcast over pub/sub so every worker drops its local
+    copy; the local TTL only bounds staleness if a broadcast is missed.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int,
+        local_ttl: float,
+        redis_ttl: int,
+        redis_url: str | None = None,
+    ):
+        super().__init__(namespace, redis_url)
+        self.local = LRUCache(maxsize, local_ttl)
+        self.redis_ttl = redis_ttl
+        # Invalidations seen by this worker, for get_or_load's local fill.
+        self._epoch = 0
+        self.stats.update(local_hits=0, redis_hits=0, misses=0)
+
+    async def get_or_load(
+        self, key: str, load: Callable[[], Awaitable], skip_local=False
+    ):
+        """Cached value of key, or load() stored unless it returned None.
+
+        skip_local ignores the local tier, whose invalidation may not have
+        arrived yet, for reads that must see the latest write.
+
+        The stored value must not outlive an invalidation that happened
+        while it was loaded: the Redis fill is a compare-and-set against
+        the key's invalidation count read with the miss, and the local
+        fill is skipped if any invalidation reached this worker meanwhile.
+        """
+        value = None if skip_local else self.local.get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+        epoch = self._epoch
+        generation = None
+        client = self._client()
+        if client is not None:
+            try:
+                raw, generation = await client.mget(
+                    self._key(key), self._generation_key(key)
+                )
+            except RedisError as ex:
+                self._redis_failed(ex)
+                client = None
+            else:
+                if raw is not None:
+                    self.stats["redis_hits"] += 1
+                    value = json.loads(raw)
+                    self.local.set(key, value)
+                    return value
+        self.stats["misses"] += 1
+        value = await load()
+        if value is None:
+            return None
+        if self._epoch == epoch:
+            self.local.set(key, value)
+        if client is not None:
+            try:
+                await client.eval(
+                    _FILL_SCRIPT,
+                    2,
+                    self._key(key),
+                    self._generation_key(key),
+                    generation or b"",
+                    json.dumps(value, default=str),
+                    self.redis_ttl,
+                )
+            except RedisError as ex:
+                self._redis_failed(ex)
+        return value
+
+    def _generation_key(self, key: str) -> str:
+        return self._key(f"{key}:generation")
+
+    async def invalidate(self, *keys: str) -> None:
+        self._epoch += 1
+        for key in keys:
+            self.local.delete(key)
+        client = self._client()
+        if client is not None and keys:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.delete(self._key(key))
+                        # Outlives any load that could have read it.
+                        pipe.incr(self._generation_key(key))
+                        pipe.expire(self._generation_key(key), self.redis_ttl)
+                        pipe.publish(self.channel, key)
+                    await pipe.execute()
+            except RedisError as ex:
+                self._redis_failed(ex)
+
+    def on_invalidate(self, key: str) -> None:
+        self._epoch += 1
+        self.local.delete(key)
+
+    def on_listener_lost(self) -> None:
+        self._epoch += 1
+        self.local.clear()
+
+
+product_cache = TwoTierCache(
+    "product",
+    maxsize=int(getenv("PRODUCT_CACHE_SIZE", 4096)),
+    local_ttl=float(getenv("PRODUCT_CACHE_LOCAL_TTL", 30)),
+    redis_ttl=int(getenv("PRODUCT_CACHE_REDIS_TTL", 600)),
+    redis_url=getenv("REDIS_URL"),
+)
@@ -0,0 +1,237 @@
+import zlib
+
+import anyio
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import getenv
+from app.utils.cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MINIMUM_SIZE = int(getenv("COMPRESSION_MINIMUM_SIZE", 1000))
+# Bodies (or stream chunks) above this are compressed in a worker thread;
+# zlib, brotli and zstandard all release the GIL while compressing.
+OFFLOAD_SIZE = int(getenv("COMPRESSION_OFFLOAD_SIZE", 64 * 1024))
+VARIANT_CACHE_SIZE = int(getenv("COMPRESSION_CACHE_SIZE", 1024))
+VARIANT_MAX_SIZE = 1024 * 1024
+
+# Levels per profile and encoding. "max" is meant for routes whose
+# responses carry an ETag: their variants are cached, so the expensive
+# compression runs once per version rather than once per request, and in
+# a worker thread whatever the size. Without a strong ETag (no Redis)
+# nothing is cached and "max" falls back to the "default" levels.
+PROFILES = {
+    "fast": {"zstd": 1, "br": 1, "gzip": 1},
+    "default": {"zstd": 3, "br": 4, "gzip": 6},
+    "max": {"zstd": 19, "br": 11, "gzip": 9},
+}
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+
+class Compressor:
+    """Uniform compress/finish interface over zlib, brotli and zstandard.
+
+    chunk() flushes, so every streamed chunk can be decoded on arrival.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._impl = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._impl = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.flush()
+        if self.encoding == "zstd":
+            flush = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            flush = zlib.Z_SYNC_FLUSH
+        return self._impl.compress(data) + self._impl.flush(flush)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.finish()
+        return self._impl.compress(data) + self._impl.flush()
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Encodings available here, in server preference order."""
+    return tuple(
+        encoding
+        for encoding, available in (
+            ("zstd", zstandard is not None),
+            ("br", brotli is not None),
+            ("gzip", True),
+        )
+        if available
+    )
+
+
+ENCODINGS = supported_encodings()
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Best encoding acceptable to the client (q-values honoured)."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, default)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compression(profile: str):
+    """Route dependency selecting a compression profile (see PROFILES)."""
+
+    def set_profile(request: Request) -> None:
+        request.scope["compression"] = profile
+
+    return set_profile
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of a compressed representation (RFC 9110 8.8.3)."""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+# Compressed bodies keyed by (ETag, encoding, profile). An ETag already
+# identifies the exact uncompressed body (see app.utils.versions).
+variants = LRUCache(VARIANT_CACHE_SIZE)
+stats = {"compressed": 0, "offloaded": 0, "variant_hits": 0}
+
+
+def compressible(
+    status: int, headers: Headers, body: bytes, more_body: bool
+) -> bool:
+    if status in (204, 304) or "content-encoding" in headers:
+        return False
+    if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+        return False
+    return more_body or len(body) >= MINIMUM_SIZE
+
+
+async def _run(fn, size: int, *args, offload: bool = False) -> bytes:
+    if offload or size >= OFFLOAD_SIZE:
+        stats["offloaded"] += 1
+        return await anyio.to_thread.run_sync(fn, *args)
+    return fn(*args)
+
+
+class CompressionMiddleware:
+    """Pure ASGI response compression with zstd/br/gzip negotiation.
+
+    Whole bodies below MINIMUM_SIZE are sent as is; streamed bodies are
+    compressed chunk by chunk. Bodies with a strong ETag are compressed
+    once per (ETag, encoding, profile) and served from the variant cache.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+            if passthrough:
+                return await send(message)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                data = await _run(
+                    compressor.chunk if more_body else compressor.finish,
+                    len(body),
+                    body,
+                )
+                return await send({**message, "body": data})
+
+            headers = MutableHeaders(scope=start)
+            if headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+                # Shared caches must not serve this to clients that
+                # negotiate another encoding, even if it went out as is.
+                headers.add_vary_header("Accept-Encoding")
+            if encoding is None or not compressible(
+                start["status"], headers, body, more_body
+            ):
+                passthrough = True
+                await send(start)
+                return await send(message)
+
+            headers["Content-Encoding"] = encoding
+            etag = headers.get("etag")
+            if etag is not None and etag.startswith("W/"):
+                etag = None
+            if etag is not None:
+                headers["ETag"] = variant_etag(etag, encoding)
+            profile = scope.get("compression", "default")
+            if profile == "max" and (etag is None or more_body):
+                profile = "default"
+            level = PROFILES[profile][encoding]
+            stats["compressed"] += 1
+
+            if more_body:
+                del headers["content-length"]
+                compressor = Compressor(encoding, level)
+                await send(start)
+                data = await _run(compressor.chunk, len(body), body)
+                return await send({**message, "body": data})
+
+            key = (etag, encoding, profile)
+            data = variants.get(key) if etag is not None else None
+            if data is not None:
+                stats["variant_hits"] += 1
+            else:
+                data = await _run(
+                    Compressor(encoding, level).finish,
+                    len(body),
+                    body,
+                    offload=profile == "max",
+                )
+                if etag is not None and len(data) <= VARIANT_MAX_SIZE:
+                    variants.set(key, data)
+            headers["Content-Length"] = str(len(data))
+            await send(start)
+            await send({**message, "body": data})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,91 @@
+from redis.exceptions import RedisError
+
+from app.utils.cache import RedisBacked
+
+
+class Debouncer(RedisBacked):
+    """Per-key "work already scheduled" markers shared through Redis.
+
+    claim() succeeds for the first caller only, until the worker doing the
+    job releases the key; ttl bounds how long a lost job can hold it.
+    """
+
+    def __init__(self, namespace: str, ttl: int, redis_url: str | None):
+        super().__init__(namespace, redis_url)
+        self.ttl = ttl
+        self.stats.update(claimed=0, coalesced=0)
+
+    async def claim(self, key: str) -> bool | None:
+        """True if the caller should schedule the work, False if it is
+        already pending, None if Redis is unavailable."""
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            claimed = await client.set(self._key(key), 1, nx=True, ex=self.ttl)
+        except RedisError as ex:
+            self._redis_failed(ex)
+            return None
+        self.stats["claimed" if claimed else "coalesced"] += 1
+        return bool(claimed)
+
+    async def release(self, key: str) -> None:
+        client = self._client()
+        if client is not None:
+            try:
+                await client.delete(self._key(key))
+            except RedisError as ex:
+                self._redis_failed(ex)
+
+
+class DeltaBuffer(RedisBacked):
+    """Per-key numeric deltas summed in Redis until a worker takes them.
+
+    add() and take() are atomic, so concurrent writers lose no increment
+    and each one is taken once; ttl bounds how long deltas nobody takes
+    are kept.
+    """
+
+    def __init__(self, namespace: str, ttl: int, redis_url: str | None):
+        super().__init__(namespace, redis_url)
+        self.ttl = ttl
+        self.stats.update(added=0, taken=0)
+
+    async def add(self, key: str, **deltas: float) -> bool | None:
+        """True once buffered, None if Redis is unavailable and the caller
+        must apply the deltas itself."""
+        client = self._client()
+        if client is None:
+            return None
+        name = self._key(key)
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                for field, delta in deltas.items():
+                    pipe.hincrbyfloat(name, field, delta)
+                pipe.expire(name, self.ttl)
+                await pipe.execute()
+        except RedisError as ex:
+            self._redis_failed(ex)
+            return None
+        self.stats["added"] += 1
+        return True
+
+    async def take(self, key: str) -> dict[str, float] | None:
+        """Remove and return the deltas summed for key ({} if there are
+        none), or None if Redis is unavailable."""
+        client = self._client()
+        if client is None:
+            return None
+        name = self._key(key)
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hgetall(name)
+                pipe.delete(name)
+                values, _ = await pipe.execute()
+        except RedisError as ex:
+            self._redis_failed(ex)
+            return None
+        self.stats["taken"] += 1
+        return {
+            field.decode(): float(value) for field, value in values.items()
+        }
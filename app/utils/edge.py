@@ -0,0 +1,76 @@
+import asyncio
+
+from loguru import logger
+
+from app.config import getenv
+
+
+class EdgeCache:
+    """Keeps the nginx microcache in front of the API fresh.
+
+    Open-source nginx can't purge, so after a write the affected URLs are
+    re-fetched through nginx with X-Cache-Refresh, which makes it bypass
+    its cached copy and store the new response (infra/nginx.conf honours
+    the header from internal addresses only). Refreshes run in the
+    background and are best effort: URLs that are never refreshed get a
+    short TTL, so a lost refresh is bounded by refreshed_ttl.
+    """
+
+    # nginx caches one variant per normalized Accept-Encoding
+    # ($edge_encoding in infra/nginx.conf); "identity" maps to none.
+    encodings = ("zstd", "br", "gzip", "identity")
+
+    def __init__(self, url: str | None, listing_ttl: int, refreshed_ttl: int):
+        self.url = url
+        self.listing_ttl = listing_ttl
+        self.refreshed_ttl = refreshed_ttl
+        self.stats = {"refreshes": 0, "refresh_errors": 0}
+        # httpx.AsyncClient, imported and created by the first refresh.
+        self._client = None
+        self._pending: set[asyncio.Task] = set()
+
+    def headers(self, keys: list[str], refreshed: bool) -> dict:
+        """Surrogate keys and nginx TTL (X-Accel-Expires) of a response."""
+        ttl = self.refreshed_ttl if refreshed else self.listing_ttl
+        return {"Surrogate-Key": " ".join(keys), "X-Accel-Expires": str(ttl)}
+
+    def refresh(self, paths) -> None:
+        if self.url is None:
+            return
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(base_url=self.url, timeout=5)
+        for path in paths:
+            for encoding in self.encodings:
+                task = asyncio.create_task(self._refresh(path, encoding))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+
+    async def _refresh(self, path: str, encoding: str) -> None:
+        import httpx
+
+        try:
+            await self._client.get(
+                path,
+                headers={"X-Cache-Refresh": "1", "Accept-Encoding": encoding},
+            )
+            self.stats["refreshes"] += 1
+        except httpx.HTTPError as ex:
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"edge cache: refresh of {path} failed: {ex}")
+
+    async def close(self) -> None:
+        """Wait for pending refreshes, then close the client."""
+        if self._pending:
+            await asyncio.gather(*self._pending)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+edge_cache = EdgeCache(
+    url=getenv("EDGE_CACHE_URL"),
+    listing_ttl=int(getenv("EDGE_LISTING_TTL", 5)),
+    refreshed_ttl=int(getenv("EDGE_REFRESHED_TTL", 300)),
+)
@@ -1,29 +1,177 @@
-from uuid import uuid4
+import atexit
+import itertools
+import os
+import queue
+import random
+import re
+import secrets
+import sys
+import threading
+from contextvars import ContextVar
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
+import orjson
 from loguru import logger
 
-logger.add(
-    "info.log",
-    format="Log: [{extra[log_id]}:{time} - {level} - {message}]",
-    level="INFO",
-    enqueue=True,
-)
+from app.config import getenv
 
+LOG_FILE = getenv("LOG_FILE", "info.log")
+LOG_LEVEL = getenv("LOG_LEVEL", "INFO")
+# Share of successful, fast requests that get an access log line; errors
+# (status >= 400) and requests slower than LOG_SLOW_MS are always logged.
+LOG_SAMPLE_RATE = float(getenv("LOG_SAMPLE_RATE", 0.1))
+LOG_SLOW_MS = float(getenv("LOG_SLOW_MS", 500))
+LOG_QUEUE_SIZE = int(getenv("LOG_QUEUE_SIZE", 10_000))
+LOG_BATCH_SIZE = int(getenv("LOG_BATCH_SIZE", 500))
+LOG_FLUSH_INTERVAL = float(getenv("LOG_FLUSH_INTERVAL", 1.0))
+# Longest a warning or error waits for room in a full queue, blocking the
+# thread (often the event loop) that logs it.
+LOG_PUT_TIMEOUT = float(getenv("LOG_PUT_TIMEOUT", 0.05))
 
-async def log_middleware(request: Request, call_next):
-    log_id = str(uuid4())
-    with logger.contextualize(log_id=log_id):
+REQUEST_ID_HEADER = b"x-request-id"
+valid_request_id = re.compile(rb"[\w.:-]{1,128}").fullmatch
+# Request ids are a per-process random prefix and a counter: unique and
+# far cheaper than uuid4() per request.
+_id_prefix = secrets.token_hex(4)
+_id_counter = itertools.count(1)
+
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+def new_request_id() -> str:
+    return f"{_id_prefix}-{next(_id_counter):x}"
+
+
+class BatchingSink:
+    """Loguru sink writing JSON lines from a background thread in batches.
+
+    The queue is bounded: when it is full, records below WARNING are
+    dropped (and counted) instead of stalling requests, while warnings and
+    errors wait up to LOG_PUT_TIMEOUT for room before they are dropped too.
+    """
+
+    def __init__(self, path: str, maxsize: int, batch_size: int):
+        self.path = path
+        self.batch_size = batch_size
+        self.queue: queue.Queue[bytes | None] = queue.Queue(maxsize)
+        self.dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        record = message.record
+        line = orjson.dumps(
+            {
+                "time": record["time"].isoformat(),
+                "level": record["level"].name,
+                "message": record["message"],
+                "request_id": request_id.get(),
+                **record["extra"],
+                **(
+                    {"exception": repr(record["exception"].value)}
+                    if record["exception"]
+                    else {}
+                ),
+            },
+            default=str,
+        )
         try:
-            response = await call_next(request)
-            if response.status_code in [401, 402, 403, 404]:
-                logger.warning(f"Request to {request.url.path} failed")
-            else:
-                logger.info("Successfully accessed " + request.url.path)
-        except Exception as ex:
-            logger.error(f"Request to {request.url.path} failed: {ex}")
-            response = JSONResponse(
-                content={"success": False}, status_code=500
-            )
-        return response
+            self.queue.put_nowait(line)
+        except queue.Full:
+            if record["level"].no >= logger.level("WARNING").no:
+                try:
+                    self.queue.put(line, timeout=LOG_PUT_TIMEOUT)
+                    return
+                except queue.Full:
+                    pass
+            self.dropped += 1
+
+    def _run(self) -> None:
+        with open(self.path, "ab") as file:
+            while True:
+                try:
+                    line = self.queue.get(timeout=LOG_FLUSH_INTERVAL)
+                except queue.Empty:
+                    continue
+                batch = []
+                while line is not None:
+                    batch.append(line)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        line = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    file.write(b"\n".join(batch) + b"\n")
+                    file.flush()
+                if line is None:
+                    return
+
+    def close(self) -> None:
+        """Write out what is queued; called at exit."""
+        self.queue.put(None)
+        self._thread.join(timeout=5)
+
+
+sink: BatchingSink | None = None
+_sink_pid: int | None = None
+
+
+def setup() -> BatchingSink:
+    """Route loguru to stderr (errors) and the batching JSON file sink.
+
+    Called on startup rather than at import, so importing the app (tests,
+    scripts) starts no writer thread. Idempotent per process; a forked
+    child (a prefork Celery worker) gets a sink of its own, since the
+    parent's writer thread does not survive the fork.
+    """
+    global sink, _sink_pid
+    if sink is not None and _sink_pid == os.getpid():
+        return sink
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    sink = BatchingSink(LOG_FILE, LOG_QUEUE_SIZE, LOG_BATCH_SIZE)
+    _sink_pid = os.getpid()
+    logger.add(sink, level=LOG_LEVEL, format="{message}", catch=True)
+    atexit.register(sink.close)
+    return sink
+
+
+def access_log(
+    method: str, path: str, status: int, duration_ms: float
+) -> None:
+    always = status >= 400 or duration_ms >= LOG_SLOW_MS
+    if always or random.random() < LOG_SAMPLE_RATE:
+        logger.log(
+            (
+                "ERROR"
+                if status >= 500
+                else "WARNING" if status >= 400 else "INFO"
+            ),
+            "request",
+            method=method,
+            path=path,
+            status=status,
+            duration_ms=round(duration_ms, 3),
+        )
+
+
+# Celery signal handlers, connected by app.celery_app.
+def add_request_id(headers=None, **kwargs):
+    """Tasks sent while serving a request carry its id."""
+    rid = request_id.get()
+    if rid is not None and headers is not None:
+        headers.setdefault("request_id", rid)
+
+
+def bind_request_id(task=None, **kwargs):
+    rid = getattr(task.request, "request_id", None)
+    task.request.log_token = request_id.set(rid or new_request_id())
+
+
+def unbind_request_id(task=None, **kwargs):
+    token = getattr(task.request, "log_token", None)
+    if token is not None:
+        request_id.reset(token)
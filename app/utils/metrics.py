@@ -0,0 +1,123 @@
+import time
+from contextvars import ContextVar
+
+import prometheus_client
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.responses import Response
+
+from app.config import getenv
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set (docker-compose.prod.yml)
+# and every worker writes its samples to mmapped files there; /metrics
+# aggregates the files of all workers, whichever worker serves it.
+MULTIPROCESS = getenv("PROMETHEUS_MULTIPROC_DIR") is not None
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time until the last byte of the response was sent.",
+    ["method", "route"],
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size as sent (after compression).",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being served.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while serving a request.",
+    ["route"],
+    buckets=QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    "db_query_seconds_per_request",
+    "Time spent executing SQL statements while serving a request.",
+    ["route"],
+)
+
+# [statement count, seconds] of the request being served, if any.
+db_usage: ContextVar[list | None] = ContextVar("db_usage", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, *args):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, *args):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    usage = db_usage.get()
+    if usage is not None:
+        usage[0] += 1
+        usage[1] += elapsed
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count statements and their time into the current request's usage.
+
+    Safe to call again for the same engine (every app startup does).
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(
+        sync_engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(
+            sync_engine, "before_cursor_execute", _before_cursor_execute
+        )
+        event.listen(
+            sync_engine, "after_cursor_execute", _after_cursor_execute
+        )
+
+
+def route_name(scope) -> str:
+    """Route template (bounded label cardinality), not the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+def observe_request(
+    method: str,
+    route: str,
+    status: int,
+    duration: float,
+    size: int,
+    usage: list,
+) -> None:
+    REQUESTS.labels(method, route, status).inc()
+    LATENCY.labels(method, route).observe(duration)
+    RESPONSE_SIZE.labels(method, route).observe(size)
+    DB_QUERIES.labels(route).observe(usage[0])
+    DB_TIME.labels(route).observe(usage[1])
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition of all metrics, aggregated over workers if needed."""
+    if MULTIPROCESS:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return (
+        prometheus_client.generate_latest(registry),
+        prometheus_client.CONTENT_TYPE_LATEST,
+    )
+
+
+async def scrape() -> Response:
+    """Prometheus scrape endpoint; nginx keeps it off the public site."""
+    body, content_type = render()
+    return Response(body, media_type=content_type)
@@ -0,0 +1,77 @@
+import time
+
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+from app.utils import log, metrics
+
+
+def incoming_request_id(scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == log.REQUEST_ID_HEADER:
+            return value.decode() if log.valid_request_id(value) else None
+    return None
+
+
+class ObservabilityMiddleware:
+    """Request id, metrics and access log in one pure ASGI middleware.
+
+    Only send is wrapped, so response bodies (streamed ones included) pass
+    straight through and are timed until their last chunk. An exception
+    raised before the response has started is logged and answered with a
+    500; after that it can only be re-raised.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rid = incoming_request_id(scope) or log.new_request_id()
+        rid_header = (log.REQUEST_ID_HEADER, rid.encode())
+        method = scope["method"]
+        status = 500
+        size = 0
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal status, size, started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                started = True
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", ()), rid_header],
+                }
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        usage = [0, 0.0]
+        rid_token = log.request_id.set(rid)
+        usage_token = metrics.db_usage.set(usage)
+        metrics.IN_PROGRESS.labels(method).inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as ex:
+            logger.opt(exception=ex).error(
+                "request failed", method=method, path=scope["path"]
+            )
+            if started:
+                raise
+            response = JSONResponse(
+                content={"success": False}, status_code=500
+            )
+            await response(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.IN_PROGRESS.labels(method).dec()
+            route = metrics.route_name(scope)
+            metrics.observe_request(
+                method, route, status, duration, size, usage
+            )
+            log.access_log(method, scope["path"], status, duration * 1000)
+            metrics.db_usage.reset(usage_token)
+            log.request_id.reset(rid_token)
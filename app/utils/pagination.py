@@ -0,0 +1,94 @@
+import base64
+import binascii
+import json
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.rows import as_dicts
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Opaque cursor: urlsafe base64 of the sort name and last key values."""
+    raw = json.dumps({"s": sort, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _matches(value: Any, key) -> bool:
+    """Whether a cursor value can be compared with column key."""
+    if value is None:
+        return key.nullable
+    expected = key.type.python_type
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, sort: str, keys: Sequence) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        values = payload["v"]
+        if payload["s"] != sort or len(values) != len(keys):
+            raise ValueError
+        if not all(map(_matches, values, keys)):
+            raise ValueError
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return values
+
+
+def keyset(
+    query: Select,
+    keys: Sequence,
+    cursor: str | None,
+    sort: str = "id",
+    descending: bool = False,
+) -> Select:
+    """Apply keyset ordering (and the cursor position, if any) to query.
+
+    keys must end with a unique column (normally the primary key) so that
+    the order is total and no row is skipped or repeated between pages.
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, sort, keys)
+        if len(keys) == 1:
+            left, right = keys[0], values[0]
+        else:
+            left, right = tuple_(*keys), tuple_(*values)
+        query = query.where(left < right if descending else left > right)
+    return query.order_by(*(key.desc() if descending else key for key in keys))
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    keys: Sequence,
+    cursor: str | None,
+    limit: int,
+    sort: str = "id",
+    descending: bool = False,
+) -> dict:
+    """Fetch one page of query as {"items": [...], "next": cursor | None}.
+
+    One row more than limit is read to find out whether a next page exists
+    without issuing a separate COUNT query.
+    """
+    query = keyset(query, keys, cursor, sort, descending).limit(limit + 1)
+    items = as_dicts(await db.execute(query))
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(sort, [last[key.key] for key in keys])
+    return {"items": items, "next": next_cursor}
@@ -0,0 +1,71 @@
+import asyncio
+from concurrent import futures
+
+from app.config import getenv
+
+BCRYPT_ROUNDS = int(getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(getenv("PASSWORD_HASH_WORKERS", 4))
+# "thread" is enough for bcrypt, which releases the GIL while hashing;
+# "process" isolates hashing from the worker's interpreter entirely.
+PASSWORD_HASH_EXECUTOR = getenv("PASSWORD_HASH_EXECUTOR", "thread")
+
+_context = None
+_executor: futures.Executor | None = None
+
+
+def _get_context():
+    """passlib is imported on first use, in the process doing the hashing.
+
+    Hashes made with a different number of rounds are reported by
+    needs_update() and transparently replaced on the next successful login.
+    """
+    global _context
+    if _context is None:
+        from passlib.context import CryptContext
+
+        _context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+        )
+    return _context
+
+
+def _get_executor() -> futures.Executor:
+    global _executor
+    if _executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _executor = futures.ProcessPoolExecutor(PASSWORD_HASH_WORKERS)
+        else:
+            _executor = futures.ThreadPoolExecutor(
+                PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+    return _executor
+
+
+def _hash(password: str) -> str:
+    return _get_context().hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> tuple[bool, str | None]:
+    return _get_context().verify_and_update(password, hashed)
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _hash, password)
+
+
+async def verify_password(
+    password: str, hashed: str
+) -> tuple[bool, str | None]:
+    """Return (is_valid, new_hash); new_hash is set when a rehash is due."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), _verify_and_update, password, hashed
+    )
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
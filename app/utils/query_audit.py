@@ -0,0 +1,174 @@
+import atexit
+import hashlib
+import json
+import re
+from collections import Counter
+from contextvars import ContextVar
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import getenv
+from app.utils.metrics import route_name
+
+# off: no hooks are installed. warn: problems are logged. strict: they are
+# also raised once the response has been sent, which fails the test that
+# made the request (TestClient re-raises app exceptions); not for serving.
+MODE = getenv("QUERY_AUDIT", "off")
+ENABLED = MODE in ("warn", "strict")
+# A statement shape executed this many times in one request is an N+1.
+REPEAT_LIMIT = int(getenv("QUERY_AUDIT_REPEAT_LIMIT", 3))
+# JSON summary written at exit, e.g. after a test run.
+REPORT_PATH = getenv("QUERY_AUDIT_REPORT")
+
+_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|:\w+|\b\d+(?:\.\d+)?\b"), "?"),
+    # Expanded IN lists and multi-row VALUES differ only in their length.
+    (re.compile(r"\?(?:\s*,\s*\?)+"), "?+"),
+    (re.compile(r"\(\?\+?\)(?:\s*,\s*\(\?\+?\))+"), "(?+)+"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals and placeholders collapsed to "?"."""
+    for pattern, replacement in _PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class RequestAudit:
+    def __init__(self):
+        self.shapes: Counter[str] = Counter()
+        self.budget: int | None = None
+
+    @property
+    def count(self) -> int:
+        return sum(self.shapes.values())
+
+    def repeated(self) -> list[str]:
+        return [
+            shape
+            for shape, count in self.shapes.items()
+            if count >= REPEAT_LIMIT
+        ]
+
+    def problems(self, route: str) -> list[str]:
+        problems = [
+            f"{route}: {self.shapes[shape]}x {shape[:200]}"
+            for shape in self.repeated()
+        ]
+        if self.budget is not None and self.count > self.budget:
+            problems.append(
+                f"{route}: {self.count} queries, budget is {self.budget}"
+            )
+        return problems
+
+
+current_audit: ContextVar[RequestAudit | None] = ContextVar(
+    "current_audit", default=None
+)
+# Per-route totals over the life of the process.
+summary: dict[str, dict] = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, *args):
+    audit = current_audit.get()
+    if audit is not None:
+        audit.shapes[fingerprint(statement)] += 1
+
+
+def instrument(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(
+        sync_engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(
+            sync_engine, "before_cursor_execute", _before_cursor_execute
+        )
+
+
+def query_budget(limit: int):
+    """Route dependency: at most limit statements per request."""
+
+    def check() -> None:
+        audit = current_audit.get()
+        if audit is not None:
+            audit.budget = limit
+
+    return check
+
+
+def _record(route: str, audit: RequestAudit) -> None:
+    totals = summary.setdefault(
+        route,
+        {
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "budget": None,
+            "over_budget": 0,
+            "repeated": {},
+        },
+    )
+    totals["requests"] += 1
+    totals["queries"] += audit.count
+    totals["max_queries"] = max(totals["max_queries"], audit.count)
+    totals["budget"] = audit.budget
+    if audit.budget is not None and audit.count > audit.budget:
+        totals["over_budget"] += 1
+    for shape in audit.repeated():
+        key = hashlib.blake2b(shape.encode(), digest_size=6).hexdigest()
+        totals["repeated"].setdefault(key, {"statement": shape, "times": 0})
+        totals["repeated"][key]["times"] += 1
+
+
+def report() -> dict:
+    """Summary per route, worst (most queries per request) first."""
+    return dict(
+        sorted(
+            summary.items(),
+            key=lambda item: item[1]["queries"] / item[1]["requests"],
+            reverse=True,
+        )
+    )
+
+
+def write_report() -> None:
+    if REPORT_PATH and summary:
+        with open(REPORT_PATH, "w") as file:
+            json.dump(report(), file, indent=2)
+
+
+class QueryAuditMiddleware:
+    """Audit the statements of every HTTP request (QUERY_AUDIT mode)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        audit = RequestAudit()
+        token = current_audit.set(audit)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_audit.reset(token)
+        route = f"{scope['method']} {route_name(scope)}"
+        problems = audit.problems(route)
+        _record(route, audit)
+        for problem in problems:
+            logger.warning(f"query audit: {problem}")
+        if problems and MODE == "strict":
+            raise QueryBudgetExceeded("; ".join(problems))
+
+
+if ENABLED:
+    atexit.register(write_report)
@@ -0,0 +1,16 @@
+from sqlalchemy import Result
+
+
+def as_dicts(result: Result, rows=None) -> list[dict]:
+    """Plain dicts built from row tuples of result (or the given rows).
+
+    Zipping the tuples with the result keys once is markedly cheaper than
+    going through RowMapping, and pydantic validates plain dicts fastest.
+    """
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in (result if rows is None else rows)]
+
+
+def first_dict(result: Result) -> dict | None:
+    row = result.first()
+    return None if row is None else dict(zip(result.keys(), row))
@@ -0,0 +1,80 @@
+import csv
+import io
+from typing import AsyncIterator
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.utils.rows import as_dicts
+
+STREAM_BATCH_SIZE = 500
+
+
+async def stream_rows(
+    query: Select, sessionmaker: async_sessionmaker
+) -> AsyncIterator[list[dict]]:
+    """Yield batches of rows read through a server-side cursor.
+
+    The session is opened here rather than taken from get_read_db: the body
+    of a StreamingResponse is sent after request dependencies have been
+    closed. Routes pass db_depends.read_sessionmaker(request), so streams
+    pick a replica (or the primary) the way get_read_db does.
+    """
+    async with sessionmaker() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield as_dicts(result, partition)
+
+
+def ndjson_response(
+    query: Select, sessionmaker: async_sessionmaker
+) -> StreamingResponse:
+    async def body():
+        async for partition in stream_rows(query, sessionmaker):
+            yield b"".join(orjson.dumps(row) + b"\n" for row in partition)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def csv_response(
+    query: Select, sessionmaker: async_sessionmaker
+) -> StreamingResponse:
+    """Stream query as CSV, one encoded chunk per fetched batch.
+
+    The header comes from the selected columns, so an empty result is still
+    a valid CSV file.
+    """
+
+    async def body():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(query.selected_columns.keys())
+        async for partition in stream_rows(query, sessionmaker):
+            writer.writerows(row.values() for row in partition)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    return StreamingResponse(body(), media_type="text/csv")
+
+
+def export_response(
+    query: Select,
+    export_format: str,
+    filename: str,
+    sessionmaker: async_sessionmaker,
+) -> StreamingResponse:
+    """Stream query as a downloadable NDJSON or CSV attachment."""
+    if export_format == "csv":
+        response = csv_response(query, sessionmaker)
+    else:
+        response = ndjson_response(query, sessionmaker)
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
@@ -1,25 +0,0 @@
-import time
-
-# from fastapi import Request
-# from main import app
-
-
-class TimingMiddleware:
-    def __init__(self, app):
-        self.app = app
-
-    async def __call__(self, scope, receive, send):
-        start_time = time.time()
-        await self.app(scope, receive, send)
-        duration = time.time() - start_time
-        print(f"Request duration: {duration:.10f} seconds")
-
-
-# # v2
-# @app.middleware("http")
-# async def modify_request_response(request: Request, call_next):
-#     start_time = time.time()
-#     response = await call_next(request)
-#     duration = time.time() - start_time
-#     print(f"Request duration: {duration:.10f} seconds")
-#     return response
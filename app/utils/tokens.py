@@ -0,0 +1,87 @@
+import hashlib
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import getenv
+from app.utils.cache import LRUCache, RedisBacked
+
+
+def token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+class VerifiedTokenCache(RedisBacked):
+    """Claims of already verified JWTs, keyed by token digest.
+
+    An entry lives until the token's exp, so a cached token expires exactly
+    when it would have failed verification. Revoked digests are written to
+    Redis until exp and broadcast, so every worker drops its cached claims;
+    the Redis denylist is consulted only when a token has to be verified,
+    which keeps cache hits free of network round trips. While Redis is
+    configured but unavailable, revocation is unknown and tokens that need
+    verification are refused: a logged-out token must not come back.
+    """
+
+    def __init__(self, maxsize: int, redis_url: str | None = None):
+        super().__init__("revoked-token", redis_url)
+        self.claims = LRUCache(maxsize)
+        self.revoked = LRUCache(maxsize)
+        self.stats.update(hits=0, misses=0)
+
+    def get(self, token: str) -> dict | None:
+        digest = token_digest(token)
+        claims = self.claims.get(digest)
+        if claims is None or claims["exp"] <= time.time():
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return claims
+
+    def set(self, token: str, claims: dict) -> None:
+        ttl = claims["exp"] - time.time()
+        if ttl > 0:
+            self.claims.set(token_digest(token), claims, ttl=ttl)
+
+    async def is_revoked(self, token: str) -> bool | None:
+        """None if revocation cannot be checked (Redis unavailable)."""
+        digest = token_digest(token)
+        if self.revoked.get(digest):
+            return True
+        if self.redis_url is None:
+            return False
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            return bool(await client.exists(self._key(digest)))
+        except RedisError as ex:
+            self._redis_failed(ex)
+            return None
+
+    async def revoke(self, token: str, exp: float) -> None:
+        digest = token_digest(token)
+        ttl = exp - time.time()
+        if ttl <= 0:
+            return
+        self.claims.delete(digest)
+        self.revoked.set(digest, True, ttl=ttl)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.set(self._key(digest), 1, ex=int(ttl) + 1)
+                await client.publish(self.channel, digest)
+            except RedisError as ex:
+                self._redis_failed(ex)
+
+    def on_invalidate(self, key: str) -> None:
+        self.claims.delete(key)
+
+    def on_listener_lost(self) -> None:
+        self.claims.clear()
+
+
+token_cache = VerifiedTokenCache(
+    maxsize=int(getenv("TOKEN_CACHE_SIZE", 10_000)),
+    redis_url=getenv("REDIS_URL"),
+)
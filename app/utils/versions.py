@@ -0,0 +1,154 @@
+import hashlib
+import re
+import time
+
+from redis.exceptions import RedisError
+from starlette import status
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import getenv
+from app.utils.cache import RedisBacked
+from app.utils.edge import edge_cache
+
+# Version keys. Listings depend on the catalog version (any product write,
+# including rating changes); category listings additionally depend on the
+# category tree. Product detail and reviews depend on their product only.
+CATALOG = "catalog"
+CATEGORIES = "categories"
+# How long the time of a bump is kept. It only matters while a replica may
+# not have replayed the write yet, which is seconds (DB_REPLICA_MAX_LAG).
+BUMP_TIME_TTL = 300
+
+
+def product(slug: str) -> str:
+    return f"product:{slug}"
+
+
+def edge_paths(key: str) -> list[str]:
+    """Parameterless URLs refreshed at the edge when key is bumped."""
+    if key == CATALOG:
+        return ["/products/"]
+    if key == CATEGORIES:
+        return ["/categories/"]
+    slug = key.removeprefix("product:")
+    return [f"/products/detail/{slug}", f"/reviews/{slug}/"]
+
+
+class VersionCounters(RedisBacked):
+    """Counters bumped by write paths and compared by conditional GETs.
+
+    Counters live in Redis so that every worker sees every bump; a missing
+    counter (new key, flushed Redis) is seeded from the clock, so a counter
+    never goes back to a value an old ETag was built from. Without a
+    redis_url, or while Redis is down, no version is known and responses go
+    out without an ETag: process-local counters would let one worker answer
+    304 for a body another worker's write has changed.
+
+    Each bump also records its time, so that a response built from the new
+    versions is not read from a replica that has not replayed the write.
+    """
+
+    def __init__(self, redis_url: str | None = None):
+        super().__init__("version", redis_url)
+
+    async def get(self, *keys: str) -> tuple[list[int], float] | None:
+        """Versions of keys and the time of the latest recent bump of one
+        of them (0.0 if none was bumped within BUMP_TIME_TTL)."""
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(self._key(key), time.time_ns(), nx=True)
+                pipe.mget([self._key(key) for key in keys])
+                pipe.mget([self._key(f"{key}:at") for key in keys])
+                *_, values, times = await pipe.execute()
+        except RedisError as ex:
+            self._redis_failed(ex)
+            return None
+        bumped_at = max(
+            (float(at) for at in times if at is not None), default=0.0
+        )
+        return [int(value) for value in values], bumped_at
+
+    async def bump(self, *keys: str) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    # Before the new version, so it is never seen without
+                    # its time.
+                    pipe.set(
+                        self._key(f"{key}:at"), time.time(), ex=BUMP_TIME_TTL
+                    )
+                    pipe.set(self._key(key), time.time_ns(), nx=True)
+                    pipe.incr(self._key(key))
+                await pipe.execute()
+        except RedisError as ex:
+            self._redis_failed(ex)
+
+    @staticmethod
+    def etag(request: Request, versions: list[int]) -> str:
+        """Strong ETag of a response to request, given its versions."""
+        raw = f"{request.url.path}?{request.url.query}|{versions}"
+        return f'"{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"'
+
+
+# Suffix CompressionMiddleware adds to the ETag of compressed variants.
+_variant_suffix = re.compile(r'-(?:gzip|br|zstd)"$')
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    tags = {
+        _variant_suffix.sub('"', tag.strip().removeprefix("W/"))
+        for tag in if_none_match.split(",")
+    }
+    return etag in tags or "*" in tags
+
+
+def conditional_get(*keys: str):
+    """Dependency answering If-None-Match from version counters alone.
+
+    keys may reference path parameters, e.g. "product:{product_slug}".
+    A matching request is answered with 304 before the endpoint runs.
+    Otherwise the time of the latest bump goes to request.state.bumped_at
+    for get_read_db, which must not read the body from a replica that is
+    behind the versions in the ETag. Responses also carry their keys as
+    Surrogate-Key and an edge cache TTL, which is longer for URLs that
+    bump() refreshes.
+    """
+
+    async def check(request: Request, response: Response) -> None:
+        names = [key.format(**request.path_params) for key in keys]
+        refreshed = not request.url.query and request.url.path in {
+            path for name in names for path in edge_paths(name)
+        }
+        response.headers.update(edge_cache.headers(names, refreshed))
+        current = await counters.get(*names)
+        if current is None:
+            return
+        versions, request.state.bumped_at = current
+        etag = counters.etag(request, versions)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        response.headers.update(headers)
+
+    return check
+
+
+async def bump(*keys: str) -> None:
+    await counters.bump(*keys)
+    edge_cache.refresh(path for key in keys for path in edge_paths(key))
+
+
+counters = VersionCounters(redis_url=getenv("REDIS_URL"))
@@ -0,0 +1,119 @@
+"""Task throughput of the Celery worker profile and its import cost.
+
+Usage:
+    python -m benchmarks.celery_throughput --tasks 5000
+
+Tasks go through kombu's in-memory transport instead of Redis, so the
+numbers are Celery's own per-task overhead: publishing, prefetching,
+acknowledging and storing results. All tasks are published before the
+worker starts, so both sides are timed separately.
+
+"legacy" is the Celery app app.main used to define (results stored,
+early acks, default prefetch); "current" uses app.celery_app's settings.
+The worker runs the solo pool in a thread: with the memory transport, a
+threads pool and late acks stall until the next poll, which BRPOP on
+Redis does not. Prints one JSON object per profile, then the time a
+fresh interpreter takes to import the web app and the worker's tasks.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+
+from app.celery_app import celery
+
+TUNED = (
+    "task_ignore_result",
+    "task_acks_late",
+    "task_reject_on_worker_lost",
+    "worker_prefetch_multiplier",
+)
+
+
+def build(profile: str) -> Celery:
+    if profile == "legacy":
+        app = Celery(profile, broker="memory://", backend="cache+memory://")
+    else:
+        app = Celery(profile, broker="memory://")
+        app.conf.update({name: celery.conf[name] for name in TUNED})
+    # The memory transport polls instead of blocking like BRPOP does.
+    app.conf.broker_transport_options = {"polling_interval": 0.001}
+    app.conf.task_default_queue = profile
+    return app
+
+
+def measure(profile: str, tasks: int) -> dict:
+    app = build(profile)
+    done = threading.Event()
+    processed = itertools.count(1)
+
+    @app.task(name="bench.noop")
+    def noop(i):
+        if next(processed) == tasks:
+            done.set()
+        return i
+
+    start = time.perf_counter()
+    for i in range(tasks):
+        noop.delay(i)
+    published = time.perf_counter()
+    with start_worker(app, pool="solo", perform_ping_check=False):
+        started = time.perf_counter()
+        done.wait()
+        finished = time.perf_counter()
+    return {
+        "profile": profile,
+        "published_per_s": round(tasks / (published - start)),
+        "processed_per_s": round(tasks / (finished - started)),
+    }
+
+
+def run(*args: str) -> str:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        check=True,
+        env=os.environ,
+        text=True,
+    ).stdout
+
+
+def import_ms(module: str) -> float:
+    """Wall time of a fresh interpreter importing module."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    output = run("-c", code)
+    return round(float(output) * 1000, 1)
+
+
+def main(args) -> None:
+    if args.profile:
+        print(json.dumps(measure(args.profile, args.tasks)))
+        return
+    # One interpreter per profile: kombu's memory transport keeps global
+    # state that makes a second in-process worker stall.
+    tasks = str(args.tasks)
+    for profile in ("legacy", "current"):
+        output = run(
+            "-m", __spec__.name, "--tasks", tasks, "--profile", profile
+        )
+        print(output, end="")
+    for module in ("app.main", "app.tasks"):
+        print(json.dumps({"import": module, "ms": import_ms(module)}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5_000)
+    parser.add_argument("--profile", choices=("legacy", "current"))
+    main(parser.parse_args())
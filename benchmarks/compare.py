@@ -0,0 +1,57 @@
+"""Compare two benchmarks.load results, e.g. from two commits.
+
+Usage:
+    python -m benchmarks.compare base.json new.json [--threshold 10]
+
+Prints one JSON object per request name present in both runs with the
+base and new p50, p95, p99 and rps and their change in percent. With
+--threshold, exits non-zero if any latency grew or any throughput fell
+by more than that many percent, so it can gate CI.
+"""
+
+import argparse
+import json
+import sys
+
+LATENCIES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def change(base: float, new: float) -> float | None:
+    if not base:
+        return None
+    return round((new - base) / base * 100, 1)
+
+
+def compare(base: dict, new: dict, threshold: float | None) -> bool:
+    """Print the differences; returns whether a metric regressed."""
+    if base["meta"]["catalog"] != new["meta"]["catalog"]:
+        print("warning: the runs used different catalogs", file=sys.stderr)
+    regressed = False
+    for name, before in base["requests"].items():
+        after = new["requests"].get(name)
+        if after is None:
+            continue
+        row = {"name": name}
+        for metric in (*LATENCIES, "rps"):
+            delta = change(before[metric], after[metric])
+            row[metric] = [before[metric], after[metric], delta]
+            # Latency regresses upwards, throughput downwards.
+            worse = -delta if metric == "rps" and delta else delta
+            if threshold is not None and worse and worse > threshold:
+                regressed = True
+        print(json.dumps(row))
+    return regressed
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float)
+    args = parser.parse_args()
+    sys.exit(int(compare(load(args.base), load(args.new), args.threshold)))
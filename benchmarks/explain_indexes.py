@@ -0,0 +1,129 @@
+"""Before/after EXPLAIN ANALYZE of the hot filter predicates.
+
+Usage:
+    python -m benchmarks.explain_indexes --seed
+
+Each query is explained twice. The "before" run happens inside a
+transaction that drops the indexes added by migrations f5132c32abd5 and
+e7db511ec901 and is rolled back afterwards, so the database is left
+untouched. Results are printed as one JSON object per query.
+"""
+
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.backend.db import Config
+from benchmarks.seed import seed_catalog
+
+DROP_INDEXES = (
+    "ALTER TABLE reviews DROP CONSTRAINT uq_reviews_user_id_product_id",
+    "DROP INDEX ix_reviews_product_id_is_active",
+    "DROP INDEX ix_ratings_product_id_is_active",
+    "DROP INDEX ix_products_visible_id",
+    "DROP INDEX ix_products_visible_category_id",
+    "DROP INDEX ix_products_active_price_id",
+    "DROP INDEX ix_products_active_rating_id",
+)
+
+QUERIES = {
+    "all_products": """
+        SELECT * FROM products
+        WHERE is_active = true AND stock > 0
+        ORDER BY id LIMIT 21
+    """,
+    "product_by_category": """
+        SELECT * FROM products
+        WHERE category_id = :category_id
+          AND is_active = true AND stock > 0
+        ORDER BY id LIMIT 21
+    """,
+    "products_by_price": """
+        SELECT * FROM products
+        WHERE is_active = true AND stock > 0 AND price >= 1000
+        ORDER BY price, id LIMIT 21
+    """,
+    "products_by_rating_desc": """
+        SELECT * FROM products
+        WHERE is_active = true AND stock > 0
+        ORDER BY rating DESC, id DESC LIMIT 21
+    """,
+    "product_reviews": """
+        SELECT id, user_id, comment, comment_date FROM reviews
+        WHERE product_id = :product_id AND is_active = true
+    """,
+    "product_rating": """
+        SELECT avg(grade) FROM ratings
+        WHERE product_id = :product_id AND is_active = true
+    """,
+    "review_exists": """
+        SELECT EXISTS (
+            SELECT 1 FROM reviews
+            WHERE user_id = :user_id AND product_id = :product_id
+        )
+    """,
+}
+
+SAMPLE = """
+    SELECT r.user_id, r.product_id, p.category_id
+    FROM reviews r JOIN products p ON p.id = r.product_id
+    ORDER BY r.id DESC LIMIT 1
+"""
+
+
+async def explain(conn, query: str, params: dict) -> dict:
+    plan = await conn.scalar(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"), params
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return {
+        "node": plan[0]["Plan"]["Node Type"],
+        "index": plan[0]["Plan"].get("Index Name"),
+        "execution_ms": plan[0]["Execution Time"],
+    }
+
+
+async def main(args) -> None:
+    engine = create_async_engine(args.database_url)
+    if args.seed:
+        async with engine.begin() as conn:
+            await seed_catalog(
+                conn, args.users, args.categories, args.products, args.reviews
+            )
+    async with engine.connect() as conn:
+        sample = (await conn.execute(text(SAMPLE))).one()
+    params = {
+        "user_id": sample.user_id,
+        "product_id": sample.product_id,
+        "category_id": sample.category_id,
+    }
+    results = {name: {} for name in QUERIES}
+    # A fresh connection: any statement autobegins a transaction, after
+    # which conn.begin() would raise.
+    async with engine.connect() as conn:
+        async with conn.begin() as transaction:
+            for statement in DROP_INDEXES:
+                await conn.execute(text(statement))
+            for name, query in QUERIES.items():
+                results[name]["before"] = await explain(conn, query, params)
+            await transaction.rollback()
+        for name, query in QUERIES.items():
+            results[name]["after"] = await explain(conn, query, params)
+    await engine.dispose()
+    for name, result in results.items():
+        print(json.dumps({"query": name, **result}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=Config.DATABASE_URL)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--products", type=int, default=500_000)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    asyncio.run(main(parser.parse_args()))
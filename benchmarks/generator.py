@@ -0,0 +1,306 @@
+"""Seeded synthetic catalog for benchmarks and load tests.
+
+Usage:
+    python -m benchmarks.generator --create-schema --users 2000 \\
+        --categories 300 --depth 8 --products 100000 --reviews 200000
+
+Rows depend only on the arguments (and --seed), so two databases seeded
+with the same arguments hold the same catalog, and load scenarios can
+address rows by index (username, product slug) without querying the
+database. Ids are assigned explicitly: seed an empty database, created by
+the migrations or with --create-schema. Rows go through batched
+executemany INSERTs, which work on SQLite and Postgres alike; for tens of
+millions of Postgres rows, benchmarks.seed (generate_series) is faster.
+
+User 1 is an admin, the next users // 20 are suppliers and the rest are
+customers; all of them log in with PASSWORD. The number of reviews of
+product n falls off as 1/n, so the first products are hot. The last
+BURST_PRODUCTS products get no reviews, for the review_burst scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.backend.db import Base, Config
+from app.backend.ratings import reconcile_ratings
+from app.models import Category, Product, Rating, Review, User
+from app.utils.passwords import hash_password
+
+PASSWORD = "bench-password"
+BURST_PRODUCTS = 10
+BATCH_SIZE = 5_000
+
+# fmt: off
+ADJECTIVES = (
+    "red", "blue", "green", "black", "white", "wooden", "steel", "compact",
+    "deluxe", "vintage", "folding", "smart",
+)
+NOUNS = (
+    "chair", "table", "lamp", "sofa", "desk", "shelf", "kettle", "blender",
+    "speaker", "monitor", "backpack", "jacket", "mug", "rug",
+)
+# fmt: on
+
+
+@dataclass(frozen=True)
+class Catalog:
+    users: int = 1_000
+    categories: int = 100
+    depth: int = 6
+    products: int = 10_000
+    reviews: int = 20_000
+    seed: int = 1
+
+    @property
+    def suppliers(self) -> int:
+        return max(1, self.users // 20)
+
+    @property
+    def customers(self) -> range:
+        """User ids of customers."""
+        return range(self.suppliers + 2, self.users + 1)
+
+    @staticmethod
+    def username(user_id: int) -> str:
+        return f"bench-user-{user_id}"
+
+    @staticmethod
+    def product_name(product_id: int) -> str:
+        adjective = ADJECTIVES[product_id % len(ADJECTIVES)]
+        noun = NOUNS[product_id // len(ADJECTIVES) % len(NOUNS)]
+        return f"{adjective} {noun} {product_id}"
+
+    @classmethod
+    def product_slug(cls, product_id: int) -> str:
+        # What slugify(name) gives, so supplier updates keep the slug.
+        return cls.product_name(product_id).replace(" ", "-")
+
+    @staticmethod
+    def category_slug(category_id: int) -> str:
+        return f"bench-category-{category_id}"
+
+    def supplier_of(self, product_id: int) -> int:
+        return 2 + (product_id - 1) % self.suppliers
+
+    def products_of(self, supplier_id: int) -> range:
+        return range(supplier_id - 1, self.products + 1, self.suppliers)
+
+    @property
+    def burst_products(self) -> range:
+        start = max(1, self.products - BURST_PRODUCTS + 1)
+        return range(start, self.products + 1)
+
+    @property
+    def reviewed_products(self) -> int:
+        return max(1, self.products - BURST_PRODUCTS)
+
+    def popular_product(self, rng: random.Random) -> int:
+        """A product id with P(id) ~ 1/id: low ids are hot."""
+        return int((self.reviewed_products + 1) ** rng.random())
+
+
+def iter_users(catalog: Catalog, hashed_password: str):
+    for user_id in range(1, catalog.users + 1):
+        supplier = 1 < user_id <= catalog.suppliers + 1
+        yield {
+            "id": user_id,
+            "first_name": "bench",
+            "last_name": "user",
+            "username": catalog.username(user_id),
+            "email": f"{catalog.username(user_id)}@example.com",
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "is_admin": user_id == 1,
+            "is_supplier": supplier,
+            "is_customer": not supplier,
+        }
+
+
+def iter_categories(catalog: Catalog, rng: random.Random):
+    """Roots plus subtrees grown from recent categories, so chains reach
+    the full depth instead of staying log(n) deep."""
+    roots = max(1, catalog.categories // 20)
+    paths: dict[int, str] = {}
+    open_parents: list[int] = []
+    for category_id in range(1, catalog.categories + 1):
+        parent_id = None
+        if category_id > roots and open_parents:
+            parent_id = rng.choice(open_parents[-8:])
+        path = f"{paths.get(parent_id, '')}{category_id}/"
+        paths[category_id] = path
+        if path.count("/") < catalog.depth:
+            open_parents.append(category_id)
+        yield {
+            "id": category_id,
+            "name": f"bench {category_id}",
+            "slug": catalog.category_slug(category_id),
+            "is_active": True,
+            "parent_id": parent_id,
+            "path": path,
+        }
+
+
+def iter_products(catalog: Catalog, rng: random.Random):
+    for product_id in range(1, catalog.products + 1):
+        yield {
+            "id": product_id,
+            "name": catalog.product_name(product_id),
+            "slug": catalog.product_slug(product_id),
+            "description": f"bench description {product_id}",
+            "price": rng.randint(100, 100_000),
+            "image_url": "",
+            "stock": 0 if rng.random() < 0.05 else rng.randint(1, 500),
+            "category_id": rng.randint(1, catalog.categories),
+            "supplier_id": catalog.supplier_of(product_id),
+            "rating": 0.0,
+            "rating_sum": 0.0,
+            "rating_count": 0,
+            "is_active": rng.random() > 0.02,
+        }
+
+
+def iter_ratings(catalog: Catalog, rng: random.Random):
+    """(rating, review) pairs; one review per (user, product)."""
+    customers = catalog.customers
+    total = min(catalog.reviews, len(customers) * catalog.reviewed_products)
+    per_product: dict[int, int] = {}
+    while total:
+        product_id = catalog.popular_product(rng)
+        count = per_product.get(product_id, 0)
+        if count < len(customers):
+            per_product[product_id] = count + 1
+            total -= 1
+    review_id = 0
+    for product_id, count in sorted(per_product.items()):
+        for user_id in rng.sample(customers, count):
+            review_id += 1
+            yield {
+                "id": review_id,
+                "grade": float(rng.randint(1, 10)),
+                "user_id": user_id,
+                "product_id": product_id,
+                "is_active": True,
+            }, {
+                "id": review_id,
+                "user_id": user_id,
+                "product_id": product_id,
+                "rating_id": review_id,
+                "comment": "bench review",
+                "is_active": True,
+            }
+
+
+def batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def insert_batches(conn: AsyncConnection, table, rows) -> int:
+    count = 0
+    for batch in batches(rows):
+        await conn.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+async def insert_reviews(conn: AsyncConnection, pairs) -> int:
+    count = 0
+    for batch in batches(pairs):
+        await conn.execute(insert(Rating), [rating for rating, _ in batch])
+        await conn.execute(insert(Review), [review for _, review in batch])
+        count += len(batch)
+    return count
+
+
+async def reset_sequences(conn: AsyncConnection) -> None:
+    """Continue Postgres id sequences after the explicitly set ids."""
+    for table in ("users", "categories", "products", "ratings", "reviews"):
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {table}))"
+            )
+        )
+
+
+async def generate(conn: AsyncConnection, catalog: Catalog) -> dict:
+    """Insert the catalog; returns the number of rows per table."""
+    if await conn.scalar(select(func.count()).select_from(User)):
+        raise SystemExit("The database already has users; seed an empty one")
+    rng = random.Random(catalog.seed)
+    hashed_password = await hash_password(PASSWORD)
+    counts = {
+        "users": await insert_batches(
+            conn, User, iter_users(catalog, hashed_password)
+        ),
+        "categories": await insert_batches(
+            conn, Category, iter_categories(catalog, rng)
+        ),
+        "products": await insert_batches(
+            conn, Product, iter_products(catalog, rng)
+        ),
+    }
+    counts["reviews"] = await insert_reviews(conn, iter_ratings(catalog, rng))
+    await reconcile_ratings(conn)
+    if conn.dialect.name == "postgresql":
+        await reset_sequences(conn)
+    return counts
+
+
+async def main(args) -> None:
+    catalog = Catalog(
+        users=args.users,
+        categories=args.categories,
+        depth=args.depth,
+        products=args.products,
+        reviews=args.reviews,
+        seed=args.seed,
+    )
+    engine = create_async_engine(Config.DATABASE_URL)
+    try:
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            if args.create_schema:
+                await conn.run_sync(Base.metadata.create_all)
+            counts = await generate(conn, catalog)
+        elapsed = time.perf_counter() - start
+    finally:
+        await engine.dispose()
+    print(
+        json.dumps(
+            {
+                "catalog": asdict(catalog),
+                "rows": counts,
+                "s": round(elapsed, 1),
+            }
+        )
+    )
+
+
+def add_catalog_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = Catalog()
+    for name in ("users", "categories", "depth", "products", "reviews"):
+        parser.add_argument(
+            f"--{name}", type=int, default=getattr(defaults, name)
+        )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_catalog_arguments(parser)
+    parser.add_argument("--create-schema", action="store_true")
+    asyncio.run(main(parser.parse_args()))
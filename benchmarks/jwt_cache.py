@@ -0,0 +1,44 @@
+"""Per-request cost of get_current_user with and without the token cache.
+
+Usage:
+    SECRET_KEY=... ALGORITHM=HS256 python -m benchmarks.jwt_cache
+
+Prints one JSON object per mode with the mean microseconds per call.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from app.routers import auth
+from app.utils.tokens import VerifiedTokenCache
+
+
+async def measure(token: str, requests: int) -> float:
+    await auth.get_current_user(token)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await auth.get_current_user(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(args) -> None:
+    token = await auth.create_access_token(
+        "bench", 1, False, False, True, expires_delta=timedelta(minutes=20)
+    )
+    modes = {
+        "uncached": VerifiedTokenCache(maxsize=0),
+        "cached": VerifiedTokenCache(maxsize=10_000),
+    }
+    for mode, cache in modes.items():
+        auth.token_cache = cache
+        us = await measure(token, args.requests)
+        print(json.dumps({"mode": mode, "us_per_request": round(us, 2)}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    asyncio.run(main(parser.parse_args()))
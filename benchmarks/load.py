@@ -0,0 +1,206 @@
+"""Run a load scenario in-process over ASGI or against a running server.
+
+Usage:
+    python -m benchmarks.load --scenario browse --concurrency 20 \\
+        --duration 30 [--target http://localhost:8000] [--output run.json]
+
+The database must hold the catalog benchmarks.generator made with the
+same catalog arguments. With the default --target asgi the app from
+create_app() is driven through httpx's ASGI transport (lifespan
+included), so no server or sockets are involved; any other target is the
+base URL of a running server. Each of --concurrency virtual users runs
+the scenario in a loop for --duration seconds, or --iterations times,
+with a Random seeded from --seed and its index, so the sequence of
+requests is repeatable. Accounts are logged in through /auth/token
+before the clock starts; --mint-tokens signs tokens with the local
+SECRET_KEY instead, which skips bcrypt for scenarios that need many
+accounts.
+
+Prints (and writes to --output) one JSON object: the run's parameters
+and commit under "meta", and per request name the count, errors,
+requests per second and latency percentiles in milliseconds.
+benchmarks.compare diffs two of them.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import timedelta
+
+import httpx
+
+from benchmarks.generator import PASSWORD, Catalog, add_catalog_arguments
+from benchmarks.scenarios import SCENARIOS, Scenario, VirtualUser
+
+
+class Recorder:
+    def __init__(self):
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def __call__(self, name: str, seconds: float, ok: bool) -> None:
+        self.timings[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        results = {}
+        for name, timings in sorted(self.timings.items()):
+            ms = [seconds * 1000 for seconds in timings]
+            if len(ms) > 1:
+                # Inclusive: percentiles never fall outside the samples.
+                percentiles = statistics.quantiles(
+                    ms, n=100, method="inclusive"
+                )
+            else:
+                percentiles = ms * 99
+            results[name] = {
+                "count": len(ms),
+                "errors": self.errors[name],
+                "rps": round(len(ms) / elapsed, 1),
+                "mean_ms": round(statistics.fmean(ms), 3),
+                "p50_ms": round(percentiles[49], 3),
+                "p90_ms": round(percentiles[89], 3),
+                "p95_ms": round(percentiles[94], 3),
+                "p99_ms": round(percentiles[98], 3),
+                "max_ms": round(max(ms), 3),
+            }
+        return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def log_in(
+    client: httpx.AsyncClient, catalog: Catalog, user_id: int, mint: bool
+) -> str:
+    username = catalog.username(user_id)
+    if mint:
+        from app.routers.auth import create_access_token
+
+        supplier = 1 < user_id <= catalog.suppliers + 1
+        return await create_access_token(
+            username,
+            user_id,
+            user_id == 1,
+            supplier,
+            not supplier,
+            timedelta(hours=1),
+        )
+    response = await client.post(
+        "/auth/token", data={"username": username, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_user(
+    user: VirtualUser, scenario: Scenario, deadline: float, iterations: int
+) -> None:
+    done = 0
+    while time.perf_counter() < deadline and done != iterations:
+        if scenario.consumes_accounts and not user.tokens:
+            return
+        try:
+            await scenario.run(user)
+        except httpx.HTTPError:
+            # Recorded by VirtualUser.request; one failed request does not
+            # end the run.
+            pass
+        done += 1
+
+
+async def drive(client: httpx.AsyncClient, args, catalog: Catalog) -> dict:
+    scenario = SCENARIOS[args.scenario]
+    recorder = Recorder()
+    users = []
+    for worker in range(args.concurrency):
+        user = VirtualUser(
+            client,
+            catalog,
+            random.Random(f"{args.seed}-{worker}"),
+            recorder,
+        )
+        for user_id in scenario.accounts(catalog, worker, args.concurrency):
+            token = await log_in(client, catalog, user_id, args.mint_tokens)
+            user.tokens.append((user_id, token))
+        users.append(user)
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    runs = [
+        run_user(user, scenario, deadline, args.iterations) for user in users
+    ]
+    await asyncio.gather(*runs)
+    elapsed = time.perf_counter() - start
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "scenario": args.scenario,
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 3),
+            "catalog": asdict(catalog),
+        },
+        "requests": recorder.summary(elapsed),
+    }
+
+
+async def main(args) -> None:
+    catalog = Catalog(
+        users=args.users,
+        categories=args.categories,
+        depth=args.depth,
+        products=args.products,
+        reviews=args.reviews,
+        seed=args.seed,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.target == "asgi":
+        from app.main import create_app
+
+        app = create_app()
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                result = await drive(client, args, catalog)
+    else:
+        async with httpx.AsyncClient(
+            base_url=args.target, limits=limits, timeout=30
+        ) as client:
+            result = await drive(client, args, catalog)
+    output = json.dumps(result)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", choices=SCENARIOS, required=True)
+    parser.add_argument("--target", default="asgi")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--iterations", type=int, default=-1)
+    parser.add_argument("--mint-tokens", action="store_true")
+    parser.add_argument("--output")
+    add_catalog_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,149 @@
+"""Per-request overhead of the middleware stack on a trivial route.
+
+Usage:
+    python -m benchmarks.middleware --requests 20000
+
+Requests are fed straight into the ASGI app (no server, no sockets), so
+the difference to the "bare" app is the middleware cost alone. "legacy"
+is the stack app.main used before ObservabilityMiddleware: CORS, GZip,
+the print-based TimingMiddleware and the BaseHTTPMiddleware-based
+log_middleware. Prints one JSON object per stack.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from loguru import logger
+
+LOG_DIR = tempfile.mkdtemp(prefix="bench-middleware-")
+os.environ["LOG_FILE"] = os.path.join(LOG_DIR, "current.log")
+
+from app.utils import log  # noqa: E402
+from app.utils.observability import ObservabilityMiddleware  # noqa: E402
+
+sink = log.setup()
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/v1/products",
+    "raw_path": b"/v1/products",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("bench", 80),
+}
+
+
+class LegacyTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        start_time = time.time()
+        await self.app(scope, receive, send)
+        duration = time.time() - start_time
+        print(f"Request duration: {duration:.10f} seconds")
+
+
+async def legacy_log_middleware(request: Request, call_next):
+    with logger.contextualize(log_id=str(uuid4())):
+        response = await call_next(request)
+        if response.status_code in [401, 402, 403, 404]:
+            logger.warning(f"Request to {request.url.path} failed")
+        else:
+            logger.info("Successfully accessed " + request.url.path)
+        return response
+
+
+def build(stack: str) -> FastAPI:
+    app = FastAPI()
+    app_v1 = FastAPI()
+
+    @app_v1.get("/products")
+    async def get_products_v1():
+        return {"message": "e-commerce API v1"}
+
+    app.mount("/v1", app_v1)
+    if stack == "bare":
+        return app
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    if stack == "legacy":
+        app.add_middleware(LegacyTimingMiddleware)
+        app.middleware("http")(legacy_log_middleware)
+    else:
+        app.add_middleware(ObservabilityMiddleware)
+    return app
+
+
+def configure_logging(stack: str) -> None:
+    logger.remove()
+    if stack == "legacy":
+        logger.add(
+            os.path.join(LOG_DIR, "legacy.log"),
+            format="Log: [{extra[log_id]}:{time} - {level} - {message}]",
+            level="INFO",
+            enqueue=True,
+        )
+    else:
+        logger.add(sink, level="INFO", format="{message}")
+
+
+async def measure(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(SCOPE), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(args) -> None:
+    results = {}
+    for stack in ("bare", "legacy", "current"):
+        configure_logging(stack)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[stack] = await measure(build(stack), args.requests)
+        print(
+            json.dumps(
+                {
+                    "stack": stack,
+                    "us_per_request": round(results[stack], 2),
+                    "overhead_us": round(results[stack] - results["bare"], 2),
+                }
+            )
+        )
+    logger.remove()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,184 @@
+"""Load scenarios over a catalog made by benchmarks.generator.
+
+A scenario is one iteration of what a virtual user does, written against
+VirtualUser.request so every call is timed under a stable name. accounts
+picks the users a virtual user logs in as before the clock starts; a
+scenario whose accounts run out (review_burst uses each one once) stops.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.generator import PASSWORD, Catalog
+
+SORTS = ("id", "newest", "price", "-price", "rating", "-rating")
+
+
+@dataclass
+class VirtualUser:
+    client: httpx.AsyncClient
+    catalog: Catalog
+    rng: random.Random
+    record: Callable[[str, float, bool], None]
+    tokens: list[tuple[int, str]] = field(default_factory=list)
+    etags: dict[str, str] = field(default_factory=dict)
+
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[0][1]}"}
+
+    async def request(
+        self, name: str, method: str, url: str, expect=(200,), **kwargs
+    ) -> httpx.Response:
+        """Send a timed request. A transport error (timeout, reset
+        connection) is recorded as an error and re-raised, which ends the
+        scenario's iteration; run_user goes on with the next."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            await response.aread()
+        except httpx.HTTPError:
+            self.record(name, time.perf_counter() - start, False)
+            raise
+        elapsed = time.perf_counter() - start
+        self.record(name, elapsed, response.status_code in expect)
+        return response
+
+    async def get_cached(self, name: str, url: str, **kwargs):
+        """GET revalidating with the ETag of the last response, as a
+        browser would; 304s are recorded under the same name."""
+        headers = kwargs.pop("headers", {})
+        if url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        response = await self.request(
+            name, "GET", url, expect=(200, 304, 404), headers=headers, **kwargs
+        )
+        if "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+        return response
+
+
+def no_accounts(catalog: Catalog, worker: int, workers: int) -> list[int]:
+    return []
+
+
+@dataclass(frozen=True)
+class Scenario:
+    run: Callable[[VirtualUser], Awaitable[None]]
+    # (catalog, worker, workers) -> user ids to log in as
+    accounts: Callable[[Catalog, int, int], list[int]] = no_accounts
+    # Each iteration uses up one account.
+    consumes_accounts: bool = False
+
+
+async def browse(user: VirtualUser) -> None:
+    """Category tree, two listing pages, a category page and facets."""
+    catalog, rng = user.catalog, user.rng
+    await user.get_cached("categories", "/categories/")
+    sort = rng.choice(SORTS)
+    page = await user.request(
+        "products", "GET", "/products/", params={"sort": sort}
+    )
+    cursor = page.json().get("next") if page.status_code == 200 else None
+    if cursor:
+        await user.request(
+            "products_next",
+            "GET",
+            "/products/",
+            params={"sort": sort, "cursor": cursor},
+        )
+    category = rng.randint(1, catalog.categories)
+    await user.request(
+        "category_products",
+        "GET",
+        f"/products/{catalog.category_slug(category)}",
+        params={"sort": sort},
+    )
+    await user.request("facets", "GET", "/products/facets")
+
+
+async def product_detail(user: VirtualUser) -> None:
+    """A popular product and its reviews, revalidated when seen before."""
+    slug = user.catalog.product_slug(user.catalog.popular_product(user.rng))
+    await user.get_cached("product_detail", f"/products/detail/{slug}")
+    await user.get_cached("product_reviews", f"/reviews/{slug}/")
+
+
+async def login_storm(user: VirtualUser) -> None:
+    customer = user.rng.choice(user.catalog.customers)
+    await user.request(
+        "login",
+        "POST",
+        "/auth/token",
+        data={
+            "username": user.catalog.username(customer),
+            "password": PASSWORD,
+        },
+    )
+
+
+async def review_burst(user: VirtualUser) -> None:
+    """Every account reviews one of the few unreviewed products once."""
+    catalog = user.catalog
+    _, token = user.tokens.pop()
+    product_id = user.rng.choice(catalog.burst_products)
+    await user.request(
+        "add_review",
+        "POST",
+        "/reviews/",
+        expect=(201,),
+        json={"product_id": product_id, "comment": "burst", "grade": 7},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+async def supplier_update(user: VirtualUser) -> None:
+    """A supplier reads one of its products and changes price and stock."""
+    catalog, rng = user.catalog, user.rng
+    supplier_id = user.tokens[0][0]
+    products = catalog.products_of(supplier_id)
+    if not products:
+        return
+    product_id = rng.choice(products)
+    url = f"/products/detail/{catalog.product_slug(product_id)}"
+    response = await user.request(
+        "supplier_read", "GET", url, expect=(200, 404)
+    )
+    if response.status_code != 200:
+        return
+    product = response.json()
+    await user.request(
+        "supplier_update",
+        "PUT",
+        url,
+        headers=user.headers(),
+        json={
+            "name": catalog.product_name(product_id),
+            "description": product["description"],
+            "price": rng.randint(100, 100_000),
+            "image_url": product["image_url"] or "",
+            "stock": rng.randint(1, 500),
+            "category": product["category_id"],
+        },
+    )
+
+
+def customer_slice(catalog: Catalog, worker: int, workers: int) -> list[int]:
+    return list(catalog.customers[worker::workers])
+
+
+def one_supplier(catalog: Catalog, worker: int, workers: int) -> list[int]:
+    # Only the first `products` suppliers own a product.
+    return [2 + worker % max(1, min(catalog.suppliers, catalog.products))]
+
+
+SCENARIOS = {
+    "browse": Scenario(browse),
+    "product_detail": Scenario(product_detail),
+    "login_storm": Scenario(login_storm),
+    "review_burst": Scenario(review_burst, customer_slice, True),
+    "supplier_update": Scenario(supplier_update, one_supplier),
+}
@@ -0,0 +1,77 @@
+"""Latency of /products/search queries on a seeded catalog.
+
+Usage:
+    python -m benchmarks.search --seed --products 1000000
+
+Runs the same full-text and trigram queries as the endpoint for a set of
+terms and prints one JSON object per term and mode with latency
+percentiles in milliseconds and the number of rows returned.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.backend.db import Config
+from app.backend.search import full_text, fuzzy
+from app.routers.products import product_columns, visible_products
+from benchmarks.seed import seed_catalog
+
+TERMS = {
+    "full_text": ["chair", "red lamp", "steel -desk", '"wooden table"'],
+    # Misspelled names, which find nothing with full-text search.
+    "fuzzy": ["chiar", "blendr", "moniter", "backpak"],
+}
+MODES = {"full_text": full_text, "fuzzy": fuzzy}
+
+
+async def measure(conn, query, runs: int) -> dict:
+    rows = len((await conn.execute(query)).all())
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        (await conn.execute(query)).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    # Inclusive: percentiles never fall outside the samples.
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "rows": rows,
+        "p50_ms": round(percentiles[49], 3),
+        "p95_ms": round(percentiles[94], 3),
+        "p99_ms": round(percentiles[98], 3),
+    }
+
+
+async def main(args) -> None:
+    engine = create_async_engine(args.database_url)
+    if args.seed:
+        async with engine.begin() as conn:
+            await seed_catalog(
+                conn, args.users, args.categories, args.products, args.reviews
+            )
+    base = select(*product_columns).where(*visible_products)
+    async with engine.connect() as conn:
+        for mode, terms in TERMS.items():
+            for term in terms:
+                query = MODES[mode](base, term).limit(args.limit)
+                result = await measure(conn, query, args.runs)
+                print(json.dumps({"mode": mode, "term": term, **result}))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=Config.DATABASE_URL)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--reviews", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
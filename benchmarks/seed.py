@@ -0,0 +1,93 @@
+"""Bulk seeding of a benchmark catalog straight in Postgres.
+
+Rows are generated server-side with generate_series, so seeding a few
+million rows takes seconds. Every seeded row is tagged with a "bench-"
+slug/username prefix; run it against a throwaway database only.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+SEED_STATEMENTS = (
+    """
+    INSERT INTO users (first_name, last_name, username, email,
+                       hashed_password, is_active, is_admin, is_supplier,
+                       is_customer)
+    SELECT 'bench', 'user', 'bench-user-' || g,
+           'bench-user-' || g || '@example.com', '!', true, false, false,
+           true
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO categories (name, slug, is_active, parent_id)
+    SELECT 'bench ' || g, 'bench-category-' || g, true, NULL
+    FROM generate_series(1, :categories) g
+    """,
+    """
+    UPDATE categories SET path = id || '/'
+    WHERE slug LIKE 'bench-category-%'
+    """,
+    """
+    INSERT INTO products (name, slug, description, price, image_url, stock,
+                          category_id, supplier_id, rating, is_active)
+    SELECT (ARRAY['red', 'blue', 'green', 'black', 'white', 'wooden',
+                  'steel', 'compact', 'deluxe', 'vintage'])[1 + g % 10]
+           || ' ' ||
+           (ARRAY['chair', 'table', 'lamp', 'sofa', 'desk', 'shelf',
+                  'kettle', 'blender', 'speaker', 'monitor', 'backpack',
+                  'jacket'])[1 + g / 10 % 12]
+           || ' ' || g,
+           'bench-product-' || g,
+           'bench description ' || g, (random() * 10000)::int, '',
+           (random() * 5)::int,
+           c.ids[1 + g % cardinality(c.ids)], NULL, 0, random() > 0.1
+    FROM generate_series(1, :products) g,
+         (SELECT array_agg(id) AS ids FROM categories
+          WHERE slug LIKE 'bench-category-%') c
+    """,
+    """
+    INSERT INTO ratings (grade, user_id, product_id, is_active)
+    SELECT 1 + (random() * 9)::int,
+           u.ids[1 + (g - 1) % cardinality(u.ids)],
+           p.ids[1 + (g - 1) / cardinality(u.ids)], true
+    FROM generate_series(1, :reviews) g,
+         (SELECT array_agg(id) AS ids FROM users
+          WHERE username LIKE 'bench-user-%') u,
+         (SELECT array_agg(id) AS ids FROM products
+          WHERE slug LIKE 'bench-product-%') p
+    """,
+    """
+    INSERT INTO reviews (user_id, product_id, rating_id, comment,
+                         comment_date, is_active)
+    SELECT r.user_id, r.product_id, r.id, 'bench review', now(), true
+    FROM ratings r JOIN users u ON u.id = r.user_id
+    WHERE u.username LIKE 'bench-user-%'
+    """,
+    """
+    UPDATE products
+    SET rating_sum = t.grades, rating_count = t.count,
+        rating = t.grades / t.count
+    FROM (SELECT product_id, sum(grade) AS grades, count(*) AS count
+          FROM ratings WHERE is_active = true GROUP BY product_id) t
+    WHERE products.id = t.product_id AND products.slug LIKE 'bench-product-%'
+    """,
+    "ANALYZE",
+)
+
+
+async def seed_catalog(
+    conn: AsyncConnection,
+    users: int,
+    categories: int,
+    products: int,
+    reviews: int,
+) -> None:
+    """Seed the catalog; reviews must not exceed users * products."""
+    params = {
+        "users": users,
+        "categories": categories,
+        "products": products,
+        "reviews": min(reviews, users * products),
+    }
+    for statement in SEED_STATEMENTS:
+        await conn.execute(text(statement), params)
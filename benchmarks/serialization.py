@@ -0,0 +1,91 @@
+"""Serialization cost of a 1,000-item product listing.
+
+Usage:
+    python -m benchmarks.serialization
+
+"orm" is the previous path: ORM instances walked by jsonable_encoder and
+rendered by JSONResponse. "rows" is the current one: row tuples turned
+into dicts, validated against Page[ProductOut] and rendered by
+ORJSONResponse. Prints one JSON object per path with the mean
+milliseconds per response.
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.backend.db import Base
+from app.models import Product
+from app.routers.products import product_columns
+from app.schemas import Page, ProductOut
+from app.utils.rows import as_dicts
+
+
+def seed(session: Session, items: int) -> None:
+    session.execute(
+        insert(Product),
+        [
+            {
+                "name": f"Product {i}",
+                "slug": f"product-{i}",
+                "description": "A reasonably long product description " * 4,
+                "price": i * 10,
+                "image_url": f"https://example.com/images/{i}.jpg",
+                "stock": 5,
+                "category_id": 1,
+                "supplier_id": 1,
+                "rating": 4.5,
+                "rating_sum": 9.0,
+                "rating_count": 2,
+                "is_active": True,
+            }
+            for i in range(items)
+        ],
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(args) -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Product.__table__])
+    page = TypeAdapter(Page[ProductOut])
+    with Session(engine) as session:
+        seed(session, args.items)
+        orm = session.scalars(select(Product)).all()
+        result = session.execute(select(*product_columns))
+        rows = result.all()
+
+        def orm_path():
+            return JSONResponse(jsonable_encoder(orm)).body
+
+        def rows_path():
+            items = as_dicts(result, rows)
+            content = page.dump_python(
+                page.validate_python({"items": items, "next": None}),
+                mode="json",
+            )
+            return ORJSONResponse(content).body
+
+        for name, fn in (("orm", orm_path), ("rows", rows_path)):
+            ms = timed(fn, args.repeat)
+            print(json.dumps({"path": name, "ms_per_response": round(ms, 3)}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    main(parser.parse_args())
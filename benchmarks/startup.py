@@ -0,0 +1,90 @@
+"""Startup time of the API and the Celery worker, with an import breakdown.
+
+Usage:
+    python -m benchmarks.startup --runs 5 --top 15 [--max-ms 1500]
+
+Each target is started in a fresh interpreter with -X importtime: "app"
+imports app.main and calls create_app(), "worker" imports the Celery app
+and its tasks. Prints one JSON object per target with the median wall
+time of --runs starts, the median self time per top-level package and
+the --top slowest modules by cumulative import time, then exits non-zero
+if a median exceeds --max-ms, so it can gate CI as a regression number.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+TARGETS = {
+    "app": "from app.main import create_app; create_app()",
+    "worker": "import app.celery_app, app.tasks",
+}
+
+
+def start(code: str) -> tuple[float, dict[str, int], dict[str, int]]:
+    """Wall ms of one start, self µs per package, cumulative µs per module."""
+    timed = (
+        "import time; start = time.perf_counter(); "
+        f"{code}; print((time.perf_counter() - start) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timed],
+        capture_output=True,
+        check=True,
+        env=os.environ,
+        text=True,
+    )
+    packages = defaultdict(int)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        self_us, cumulative_us, name = fields
+        if not self_us.strip().isdigit():
+            continue
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us)
+        modules[name] = int(cumulative_us)
+    return float(result.stdout.splitlines()[-1]), packages, modules
+
+
+def report(target: str, runs: int, top: int) -> dict:
+    starts = [start(TARGETS[target]) for _ in range(runs)]
+    packages = {
+        name: statistics.median(run[1].get(name, 0) for run in starts)
+        for name in starts[0][1]
+    }
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])
+    slowest = sorted(starts[0][2].items(), key=lambda item: -item[1])
+    return {
+        "target": target,
+        "ms": round(statistics.median(run[0] for run in starts), 1),
+        "packages_ms": {
+            name: round(us / 1000, 1) for name, us in heaviest[:top]
+        },
+        "modules_ms": {
+            name: round(us / 1000, 1) for name, us in slowest[:top]
+        },
+    }
+
+
+def main(args) -> int:
+    failed = False
+    for target in TARGETS:
+        result = report(target, args.runs, args.top)
+        print(json.dumps(result))
+        failed |= args.max_ms is not None and result["ms"] > args.max_ms
+    return int(failed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float)
+    sys.exit(main(parser.parse_args()))
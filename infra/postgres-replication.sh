@@ -0,0 +1,5 @@
+#!/bin/bash
+# Lets the db-replica service stream WAL from this primary. Runs once,
+# when the official postgres image initializes an empty data directory.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"